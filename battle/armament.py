@@ -1,5 +1,3 @@
-from time import sleep
-
 from core.preferences import preferences_mgr
 
 from .base import (
@@ -193,7 +191,7 @@ class ArmamentExpansionExecutor(BattleExecutorBase):
                 if self.finished or self.status is not BattleResult.NORMAL:
                     break
 
-                sleep(battle_config.get("battle_internal_delay"))
+                self.api.pacer.defer(battle_config.get("battle_internal_delay"))
 
             self.team_ref.show()
             self.back_to_home()
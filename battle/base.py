@@ -14,6 +14,7 @@ class BattleResult(Enum):
     NORMAL = "正常結束"
     BE_DEFEATED = "戰敗"
     TEAM_STATUS_BAD = "隊伍狀況不佳"
+    CONDITION_MET = "達成停止條件"
 
 
 class BattlePointType(Enum):
@@ -38,6 +39,8 @@ class BattleExecutorBase(object, metaclass=ABCMeta):
         self.team_id = team.id
         self.finished = False
         self.status = BattleResult.NORMAL
+        # battle / event 的 -u 停止條件
+        self.until = kwargs.get("until")
 
     # 創造一個活動
     @abstractmethod
@@ -91,6 +94,23 @@ class BattleExecutorBase(object, metaclass=ABCMeta):
         check_new_sword(result)
         self._update_team_info(result)
 
+        # 撿到新刀，本地的刀帳需要重新同步
+        if result.get("get_sword_id"):
+            self.team_ref.user_data.mark_dirty()
+
+        if self.until:
+            self.record_rewards(result.get("reward"))
+            self.record_rewards(result.get("drop_reward"))
+            if (
+                self.until.check(self.team_ref, result)
+                and self.status is BattleResult.NORMAL
+            ):
+                self.status = BattleResult.CONDITION_MET
+
+    def record_rewards(self, items):
+        if self.until:
+            self.until.record_rewards(items)
+
     MATERIAL = 2
 
 
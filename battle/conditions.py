@@ -0,0 +1,157 @@
+import re
+from abc import ABCMeta, abstractmethod
+
+from colorama import Fore
+
+# 戰報與資源點的 item_id -> Resources 的欄位
+RESOURCE_FIELDS = {
+    "1": "bill",
+    "2": "charcoal",
+    "3": "steel",
+    "4": "coolant",
+    "5": "file",
+}
+
+# 資源類的獎勵，資源點的資料沒有 item_type
+RESOURCE_ITEM_TYPES = (None, 5)
+
+CONDITION_PATTERN = re.compile(
+    r"^(?P<kind>[a-z]+)(?:@(?P<slot>[1-6]))?[:=](?P<value>\d+)$"
+)
+
+
+class StopCondition(object, metaclass=ABCMeta):
+    @abstractmethod
+    def met(self, team_ref, result, resources):
+        raise NotImplementedError
+
+
+class LevelCondition(StopCondition):
+    """
+    指定欄位(或全隊)的等級達到 level
+    """
+
+    attribute = "level"
+    label = "等級"
+
+    def __init__(self, value, slot=None):
+        self.value = value
+        self.slot = slot
+
+    def _swords(self, team_ref):
+        if self.slot is None:
+            return [sword for sword in team_ref.sword_refs if sword]
+
+        sword = team_ref.sword_refs[self.slot - 1]
+        return [sword] if sword else []
+
+    def met(self, team_ref, result, resources):
+        swords = self._swords(team_ref)
+        return bool(swords) and all(
+            getattr(sword, self.attribute) >= self.value for sword in swords
+        )
+
+    def __str__(self):
+        target = "全隊" if self.slot is None else f"{self.slot} 號位"
+        return f"{target}{self.label}達到 {self.value}"
+
+
+class ExpCondition(LevelCondition):
+    attribute = "exp"
+    label = "經驗值"
+
+
+class DropCondition(StopCondition):
+    """
+    撿到指定 sword_id 的刀
+    """
+
+    def __init__(self, value):
+        self.value = str(value)
+
+    def met(self, team_ref, result, resources):
+        return str(result.get("get_sword_id") or "") == self.value
+
+    def __str__(self):
+        from core.database import sword_data
+
+        return f"撿到 {sword_data.get(self.value).name}"
+
+
+class ResourceCondition(StopCondition):
+    def __init__(self, field, value):
+        self.field = field
+        self.value = value
+
+    def met(self, team_ref, result, resources):
+        return resources is not None and getattr(resources, self.field) >= self.value
+
+    def __str__(self):
+        return f"{self.field} 達到 {self.value}"
+
+
+def parse_condition(spec):
+    """
+    lv:50、lv@2:50、exp:100000、drop:3、charcoal:10000 等格式
+    """
+    match = CONDITION_PATTERN.match(spec.strip())
+    if not match:
+        raise ValueError(f"無法解析的停止條件 {spec}")
+
+    kind = match.group("kind")
+    slot = int(match.group("slot")) if match.group("slot") else None
+    value = int(match.group("value"))
+
+    if kind == "lv":
+        return LevelCondition(value, slot)
+    if kind == "exp":
+        return ExpCondition(value, slot)
+    if kind == "drop":
+        return DropCondition(value)
+    if kind in RESOURCE_FIELDS.values():
+        return ResourceCondition(kind, value)
+    raise ValueError(f"不支援的停止條件 {kind}")
+
+
+class StopConditions(object):
+    """
+    battle / event 的 -u 條件，任一條件成立就停止出陣
+
+    只使用戰報與資源點已經收到的資料判斷，不會多呼叫任何 API；
+    資源點與戰報的資源獎勵會累加到本地的 Resources
+    """
+
+    def __init__(self, conditions, resources=None):
+        self.conditions = list(conditions)
+        self.resources = resources
+        self.reached = None
+
+    @classmethod
+    def parse(cls, specs, resources=None):
+        return cls([parse_condition(spec) for spec in specs], resources)
+
+    def __bool__(self):
+        return bool(self.conditions)
+
+    def record_rewards(self, items):
+        if self.resources is None or not items:
+            return
+
+        for item in items:
+            if item.get("item_type") not in RESOURCE_ITEM_TYPES:
+                continue
+
+            field = RESOURCE_FIELDS.get(str(item.get("item_id")))
+            if field:
+                self.resources.add(field, int(item.get("item_num", 0)))
+
+    def check(self, team_ref, result):
+        """
+        回傳成立的條件，沒有則回傳 None
+        """
+        for condition in self.conditions:
+            if condition.met(team_ref, result, self.resources):
+                self.reached = condition
+                print(Fore.GREEN + f"達成停止條件：{condition}")
+                return condition
+        return None
@@ -1,5 +1,3 @@
-from time import sleep
-
 from core.preferences import preferences_mgr
 
 from .base import (BattleError, BattleExecutorBase, BattlePointType,
@@ -182,7 +180,7 @@ class ConsecutiveTeamExecutor(BattleExecutorBase):
                 if self.finished or self.status is not BattleResult.NORMAL:
                     break
 
-                sleep(battle_config.get("battle_internal_delay"))
+                self.api.pacer.defer(battle_config.get("battle_internal_delay"))
 
             self.team_ref.show()
             self.back_to_home()
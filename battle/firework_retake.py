@@ -1,5 +1,3 @@
-from time import sleep
-
 from core.preferences import preferences_mgr
 
 from .base import (BattleError, BattleExecutorBase, BattlePointType,
@@ -51,7 +49,7 @@ class FireworkRetakeEventInfo(EventInfoBase):
 
 class FireworkRetakeExecutor(BattleExecutorBase):
     def __init__(self, api, team, *args, **kwargs):
-        super().__init__(api, team)
+        super().__init__(api, team, *args, **kwargs)
         self.event_info = FireworkRetakeEventInfo.create(api)
         self.event_id = self.event_info.event_id
         self.field_id = self.event_info.field_id
@@ -156,7 +154,7 @@ class FireworkRetakeExecutor(BattleExecutorBase):
                     self.print_final_takeout()
                     break
 
-                sleep(battle_config.get("battle_internal_delay"))
+                self.api.pacer.defer(battle_config.get("battle_internal_delay"))
 
             self.team_ref.show()
             self.back_to_home()
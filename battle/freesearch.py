@@ -1,4 +1,3 @@
-from time import sleep
 from abc import ABCMeta, abstractmethod
 
 from colorama import Fore
@@ -241,7 +240,7 @@ class FreesearchExecutor(BattleExecutorBase):
                 if self.finished or self.status is not BattleResult.NORMAL:
                     break
 
-                sleep(battle_config.get("battle_internal_delay"))
+                self.api.pacer.defer(battle_config.get("battle_internal_delay"))
 
             self.print_final_takeout()
             self.team_ref.show()
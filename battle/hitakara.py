@@ -1,5 +1,3 @@
-from time import sleep
-
 from colorama import Fore
 
 from core.preferences import preferences_mgr
@@ -273,7 +271,7 @@ class HitakaraBattleExecutor(BattleExecutorBase):
                 if self.finished or self.status is not BattleResult.NORMAL:
                     break
 
-                sleep(battle_config.get("battle_internal_delay"))
+                self.api.pacer.defer(battle_config.get("battle_internal_delay"))
 
             if self.status == BattleResult.TEAM_STATUS_BAD:
                 ret = self.api.event_return()
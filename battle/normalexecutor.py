@@ -1,5 +1,3 @@
-from time import sleep
-
 import attr
 
 from core.preferences import preferences_mgr
@@ -135,6 +133,8 @@ class CommonBattleExecutor(BattleExecutorBase):
         if len(self._resource_point_data) == 0:
             return
 
+        self.record_rewards(self._resource_point_data)
+
         for material in self._resource_point_data:
             material_name = get_resource_id_name(material["item_id"])
             material_count = material["item_num"]
@@ -164,7 +164,7 @@ class CommonBattleExecutor(BattleExecutorBase):
                 ):
                     break
 
-                sleep(battle_config.get("battle_internal_delay"))
+                self.api.pacer.defer(battle_config.get("battle_internal_delay"))
 
             self.team_ref.show()
             self.back_to_home()
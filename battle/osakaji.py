@@ -1,5 +1,3 @@
-from time import sleep
-
 from core.preferences import preferences_mgr
 
 from .base import (BattleError, BattleExecutorBase, BattlePointType,
@@ -192,7 +190,7 @@ class OsakajiExecutor(BattleExecutorBase):
                 ):
                     break
 
-                sleep(battle_config.get("battle_internal_delay"))
+                self.api.pacer.defer(battle_config.get("battle_internal_delay"))
 
             self.team_ref.show()
             self.back_to_home()
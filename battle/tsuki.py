@@ -1,5 +1,3 @@
-from time import sleep
-
 from core.preferences import preferences_mgr
 
 from .base import (BattleError, BattleExecutorBase, BattlePointType,
@@ -51,7 +49,7 @@ class TsukiEventInfo(EventInfoBase):
 
 class TsukiExecutor(BattleExecutorBase):
     def __init__(self, api, team, *args, **kwargs):
-        super().__init__(api, team)
+        super().__init__(api, team, *args, **kwargs)
         self.event_info = TsukiEventInfo.create(api)
         self.event_id = self.event_info.event_id
         self.field = self.event_info.field_id
@@ -173,7 +171,7 @@ class TsukiExecutor(BattleExecutorBase):
                     self.print_final_takeout()
                     break
 
-                sleep(battle_config.get("battle_internal_delay"))
+                self.api.pacer.defer(battle_config.get("battle_internal_delay"))
 
             self.team_ref.show()
             self.back_to_home()
@@ -0,0 +1,50 @@
+import click
+from colorama import init
+from prettytable import PrettyTable
+
+from core.database import equipment_data, sword_data
+
+init(autoreset=True)
+
+
+def measure(func, keys, rounds):
+    from time import perf_counter
+
+    started = perf_counter()
+    for _ in range(rounds):
+        for key in keys:
+            func(key)
+    elapsed = perf_counter() - started
+    return elapsed / (rounds * len(keys)) * 1e6
+
+
+@click.command()
+@click.option("--rounds", default=200, show_default=True, help="每個 ID 查詢的次數")
+def cli(rounds):
+    """
+    比較主資料直接查詢 sqlite 與查詢記憶體快取的花費
+    """
+    table = PrettyTable()
+    table.field_names = ["資料表", "筆數", "sqlite(μs)", "快取(μs)", "倍數"]
+
+    for name, database in (("swords", sword_data), ("equipments", equipment_data)):
+        # 與遊戲回應一樣以字串查詢，另外混入一個不存在的 ID 測試 negative cache
+        keys = [str(key) for key in database.keys()] + ["0"]
+
+        sqlite_cost = measure(database.query, keys, rounds)
+        cached_cost = measure(database.get, keys, rounds)
+        table.add_row(
+            [
+                name,
+                len(database),
+                f"{sqlite_cost:.2f}",
+                f"{cached_cost:.3f}",
+                f"{sqlite_cost / cached_cost:.0f}x",
+            ]
+        )
+
+    print(table)
+
+
+if __name__ == "__main__":
+    cli()
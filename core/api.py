@@ -1,20 +1,31 @@
 from functools import wraps
+from threading import RLock
+from time import perf_counter
 
 import requests
 
+from .cache import ALL
 from .exceptions import APICallFailedException
+from .models import decode
 from .notification import Publisher
+from .pacer import Pacer
 
 
 def update_token(func):
+    """
+    t 必須一個接一個地傳遞，同一個帳號的請求由 token_lock 依序送出
+    """
+
     @wraps(func)
     def wrapper(self, *args, **kwargs):
-        ret = func(self, *args, **kwargs)
-        if ret["status"] == 0:
-            self.update_payload(token=ret["t"])
-            return ret
-        else:
-            raise APICallFailedException(func.__name__)
+        with self.token_lock:
+            ret = func(self, *args, **kwargs)
+            if ret["status"] == 0:
+                self.update_payload(token=ret["t"])
+                return ret
+            else:
+                self.pacer.penalize()
+                raise APICallFailedException(func.__name__)
 
     return wrapper
 
@@ -24,7 +35,7 @@ def notify_subject(name):
         def wrapper(self, *args, **kwargs):
             ret = func(self, *args, **kwargs)
             if ret["status"] == 0:
-                self.boardcast(name, ret)
+                self.boardcast(name, decode(name, ret))
             return ret
 
         return wrapper
@@ -32,15 +43,66 @@ def notify_subject(name):
     return outside
 
 
+def cached(name, notify=False):
+    """
+    命中快取時直接回傳，不更新 t，所以要放在 notify_subject 外層
+
+    notify 為 True 時，命中快取也會廣播，訂閱者看到的和實際呼叫一樣
+    """
+
+    def outside(func):
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            cache = self.cache
+            if cache is None:
+                return func(self, *args, **kwargs)
+
+            ret = cache.get(name)
+            if ret is None:
+                ret = func(self, *args, **kwargs)
+                cache.put(name, ret)
+            elif notify:
+                self.boardcast(name, decode(name, ret))
+            return ret
+
+        return wrapper
+
+    return outside
+
+
+def invalidates(*names):
+    def outside(func):
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            try:
+                return func(self, *args, **kwargs)
+            finally:
+                if self.cache is not None:
+                    self.cache.invalidate(names)
+
+        return wrapper
+
+    return outside
+
+
 class TkrbApi(Publisher):
     def __init__(self, url, user_id, cookie, token):
         super().__init__()
 
         self.session = requests.session()
+        self.cassette = None
+        self.metrics = None
+        self.cache = None
+        self.pacer = Pacer()
+        self.token_lock = RLock()
+
         self.server_url = url
         self.user_id = user_id
 
         self.params = {"uid": self.user_id}
+
+        # 建立 client 前已經確認過 t 的 login/start 回應，init_first 不再重複呼叫
+        self.validated = None
         self.payload = {"sword": cookie, "t": token}
         self.headers = {
             "Content-Type": "application/x-www-form-urlencoded",
@@ -56,11 +118,34 @@ class TkrbApi(Publisher):
         self.create_event("swap_team")
         self.create_event("battle_start")
         self.create_event("battle_end")
+        self.create_event("forge")
+        self.create_event("repair")
+        self.create_event("repair_room")
+        self.create_event("conquest")
+        self.create_event("library_changed")
+
+    def update_payload(self, cookie=None, token=None, **kwargs):
+        if cookie is not None:
+            self.payload.update({"sword": cookie})
+
+        if token is not None:
+            self.payload.update({"t": token})
+
+    def _make_data(self, data=None):
+        if not data:
+            return self.payload
+
+        from copy import deepcopy
+
+        full_data = deepcopy(self.payload)
+        full_data.update(data)
+        return full_data
 
     def __del__(self):
         self.session.close()
 
     @notify_subject("set_sword")
+    @invalidates("party_list", "sally")
     @update_token
     def set_sword(self, team, index, serial):
         url = "party/setsword"
@@ -69,6 +154,7 @@ class TkrbApi(Publisher):
         return ret
 
     @notify_subject("remove_sword")
+    @invalidates("party_list", "sally")
     @update_token
     def remove_sword(self, team, index, serial):
         url = "party/removesword"
@@ -77,6 +163,7 @@ class TkrbApi(Publisher):
         return ret
 
     @notify_subject("swap_team")
+    @invalidates("party_list", "sally")
     @update_token
     def swap_team(self, start, target):
         url = "party/partyreplacement"
@@ -84,6 +171,7 @@ class TkrbApi(Publisher):
         ret = self._request(url, data=data).json()
         return ret
 
+    @cached("sally", notify=True)
     @notify_subject("sally")
     @update_token
     def sally(self):
@@ -91,6 +179,7 @@ class TkrbApi(Publisher):
         ret = self._request(url).json()
         return ret
 
+    @invalidates("sally")
     @update_token
     def recover_event_cost(self, event_id, total):
         url = "sally/recovercost"
@@ -98,12 +187,14 @@ class TkrbApi(Publisher):
         ret = self._request(url, data=data).json()
         return ret
 
+    @invalidates(ALL)
     @update_token
     def battle_back_to_home(self):
         url = "sally/homereturn"
         ret = self._request(url).json()
         return ret
 
+    @invalidates(ALL)
     @update_token
     def battle(self, formation):
         url = "battle/battle"
@@ -111,6 +202,7 @@ class TkrbApi(Publisher):
         ret = self._request(url, data=data).json()
         return ret
 
+    @invalidates(ALL)
     @update_token
     def battle_foward(self):
         url = "sally/forward"
@@ -119,6 +211,7 @@ class TkrbApi(Publisher):
         return ret
 
     @notify_subject("battle_start")
+    @invalidates(ALL)
     @update_token
     def battle_start(self, party, episode, field):
         url = "sally/sally"
@@ -126,6 +219,7 @@ class TkrbApi(Publisher):
         ret = self._request(url, data=data).json()
         return ret
 
+    @invalidates(ALL)
     @update_token
     def event_battle_start(
         self, event_id, party, field, event_layer_id=0, item_id=0, **kwargs
@@ -150,12 +244,14 @@ class TkrbApi(Publisher):
         ret = self._request(url, data=data).json()
         return ret
 
+    @invalidates(ALL)
     @update_token
     def event_return(self, **kwargs):
         url = "sally/eventreturn"
         ret = self._request(url).json()
         return ret
 
+    @invalidates(ALL)
     @update_token
     def event_forward(self, **kwargs):
         url = "sally/eventforward"
@@ -163,12 +259,15 @@ class TkrbApi(Publisher):
         ret = self._request(url, data=data).json()
         return ret
 
+    @cached("forge_room")
     @update_token
     def forge_room(self):
         url = "forge"
         ret = self._request(url).json()
         return ret
 
+    @notify_subject("forge")
+    @invalidates("forge_room", "party_list")
     @update_token
     def forge_complete(self, slot):
         url = "forge/complete"
@@ -176,6 +275,8 @@ class TkrbApi(Publisher):
         ret = self._request(url, data=data).json()
         return ret
 
+    @notify_subject("forge")
+    @invalidates("forge_room", "party_list")
     @update_token
     def forge_start(self, slot, steel, charcoal, coolant, files, use_assist=False):
         url = "forge/start"
@@ -190,6 +291,7 @@ class TkrbApi(Publisher):
         ret = self._request(url, data=data).json()
         return ret
 
+    @cached("party_list", notify=True)
     @notify_subject("party_list")
     @update_token
     def party_list(self):
@@ -197,24 +299,29 @@ class TkrbApi(Publisher):
         ret = self._request(url).json()
         return ret
 
+    @invalidates(ALL)
     @update_token
     def event_get_party_info(self):
         url = "party/get_sally_party_info"
         ret = self._request(url).json()
         return ret
 
+    @invalidates("party_list")
     @update_token
     def complete_duty(self):
         url = "duty/complete"
         ret = self._request(url).json()
         return ret
 
+    @cached("go_conquest")
     @update_token
     def go_conquest(self):
         url = "conquest"
         ret = self._request(url).json()
         return ret
 
+    @notify_subject("conquest")
+    @invalidates("go_conquest", "party_list")
     @update_token
     def start_conquest(self, field, party):
         url = "conquest/start"
@@ -222,6 +329,8 @@ class TkrbApi(Publisher):
         ret = self._request(url, data=data).json()
         return ret
 
+    @notify_subject("conquest")
+    @invalidates("go_conquest", "party_list")
     @update_token
     def receive_conquest_reward(self, party):
         url = "conquest/complete"
@@ -229,6 +338,7 @@ class TkrbApi(Publisher):
         ret = self._request(url, data=data).json()
         return ret
 
+    @invalidates(ALL)
     @update_token
     def alloutbattle(self, party):
         url = "battle/alloutbattle"
@@ -236,6 +346,7 @@ class TkrbApi(Publisher):
         ret = self._request(url, data=data).json()
         return ret
 
+    # now 與 duty 隨時間改變，訂閱者也依賴每次的廣播，所以 home 不快取
     @notify_subject("home")
     @update_token
     def home(self):
@@ -244,18 +355,23 @@ class TkrbApi(Publisher):
         return ret
 
     @notify_subject("start")
+    @invalidates(ALL)
     @update_token
     def start(self):
         url = "login/start"
         ret = self._request(url).json()
         return ret
 
+    @cached("repair_room", notify=True)
+    @notify_subject("repair_room")
     @update_token
     def repair_room(self):
         url = "repair"
         ret = self._request(url).json()
         return ret
 
+    @notify_subject("repair")
+    @invalidates("repair_room", "party_list")
     @update_token
     def repair_start(self, serial, slot, use_assist=0):
         url = "repair/repair"
@@ -267,6 +383,8 @@ class TkrbApi(Publisher):
         ret = self._request(url, data=data).json()
         return ret
 
+    @notify_subject("repair")
+    @invalidates("repair_room", "party_list")
     @update_token
     def repair_complete(self, slot):
         url = "repair/complete"
@@ -276,23 +394,56 @@ class TkrbApi(Publisher):
         ret = self._request(url, data=data).json()
         return ret
 
-    def update_payload(self, cookie=None, token=None, **kwargs):
-        if cookie is not None:
-            self.payload.update({"sword": cookie})
+    def attach_cassette(self, cassette):
+        self.cassette = cassette
 
-        if token is not None:
-            self.payload.update({"t": token})
+    def enable_cache(self, ttl):
+        from .cache import ResponseCache
+
+        self.cache = ResponseCache(ttl)
+        return self.cache
+
+    def disable_cache(self):
+        self.cache = None
+
+    def enable_metrics(self):
+        if self.metrics is None:
+            from .metrics import ApiMetrics
+
+            self.metrics = ApiMetrics()
+        return self.metrics
+
+    def disable_metrics(self):
+        self.metrics = None
+
+    def set_pacer(self, pacer):
+        self.pacer = pacer
 
     def _request(self, url, data=None, **kwargs):
-        full_data = None
-        if data:
-            from copy import deepcopy
+        pacer = self.pacer
+        pacer.wait()
 
-            full_data = deepcopy(self.payload)
-            full_data.update(data)
+        # 沒有開啟統計時只多一次屬性檢查
+        metrics = self.metrics
+        if metrics is None:
+            resp = self._dispatch(url, data)
         else:
-            full_data = self.payload
+            started = perf_counter()
+            resp = self._dispatch(url, data)
+            metrics.record(
+                url, perf_counter() - started, len(resp.content), resp.status_code
+            )
+
+        pacer.done(resp.status_code < 400)
+        return resp
+
+    def _dispatch(self, url, data=None):
+        if self.cassette is not None:
+            return self.cassette.play(url, data, lambda: self._send(url, data))
+        return self._send(url, data)
 
+    def _send(self, url, data=None):
+        full_data = self._make_data(data)
         full_url = self.server_url + url
 
         try:
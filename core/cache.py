@@ -0,0 +1,38 @@
+from time import monotonic
+
+ALL = "*"
+
+
+class ResponseCache(object):
+    """
+    唯讀端點的回應快取，超過 ttl 秒或遇到會改變資料的呼叫就失效
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, name):
+        entry = self._entries.get(name)
+        if entry is None or monotonic() - entry[0] > self.ttl:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return entry[1]
+
+    def put(self, name, value):
+        self._entries[name] = (monotonic(), value)
+
+    def invalidate(self, names):
+        if ALL in names:
+            self._entries.clear()
+            return
+
+        for name in names:
+            self._entries.pop(name, None)
+
+    def clear(self):
+        self._entries.clear()
@@ -12,7 +12,16 @@ import repairroom
 from .api import APICallFailedException
 from .database import UserLibrary
 from .datatype import Resources, SwordTeam
-from .login import DMMAuthenticator_v2
+from .lineup import OP_REMOVE, OP_SWAP, normalize, plan_lineups
+from .login import LoginChain
+from .models import decode
+from .pacer import Pacer
+from .readiness import TEAM_CONQUEST, TEAM_NORMAL, ReadinessIndex
+from .rotation import BenchRotation
+from .sakura import SakuraPlanner
+from .session_cache import LoginSession, SessionCache
+from .sortie import SortieScheduler, SortieTarget
+from .waiter import WaitScheduler
 from .preferences import preferences_mgr
 from .utils import make_datetime
 
@@ -31,22 +40,93 @@ class TkrbClient(object):
             "3": SwordTeam(self.api, self.user_data, "3"),
             "4": SwordTeam(self.api, self.user_data, "4"),
         }
+        self.readiness = ReadinessIndex(self.api, self.user_data, self.teams)
+        self.waiter = WaitScheduler(self)
+        self.rotation = BenchRotation(self)
         self.forgeroom = forge.ForgeRoom(api)
         self.conquest = conquest.Conquest(api)
         self.repair_room = repairroom.RepairRoom(self, api)
+
+        # 由 create 設定，有的話結束時保存最新的 t
+        self.session_cache = None
+        self.dmm_cookies = []
+
+        if app_config.get("api_metrics"):
+            self.api.enable_metrics()
+
+        cache_ttl = app_config.get("cache_ttl")
+        if cache_ttl:
+            self.api.enable_cache(cache_ttl)
+
+        self.api.set_pacer(
+            Pacer(
+                spacing=app_config.get("request_spacing"),
+                jitter=app_config.get("request_jitter"),
+                adaptive=app_config.get("adaptive_pacing"),
+            )
+        )
+
         self.init_first()
 
     @classmethod
-    def create(cls, account, password):
-        api = DMMAuthenticator_v2(account, password).login()
-        if not api:
+    def create(cls, account, password, cassette=None):
+        cache = SessionCache.open(account, password)
+        restored = cache.restore() if cache else None
+
+        if restored:
+            api, dmm_cookies = restored
+            print(Fore.GREEN + "沿用先前的登入資訊")
+        else:
+            authenticator = LoginChain(account, password)
+            api = authenticator.login()
+            if not api:
+                return None
+            dmm_cookies = authenticator.export_cookies()
+
+        # 從初始化開始記錄，回放時才能完整重現
+        if cassette is not None:
+            api.attach_cassette(cassette)
+            api.validated = None
+
+        client = cls(api)
+        if cache:
+            client.session_cache = cache
+            client.dmm_cookies = dmm_cookies
+            client.save_session()
+        return client
+
+    def save_session(self):
+        """
+        保存目前的 t，下次啟動時直接沿用
+        """
+        if self.session_cache is None:
+            return
+
+        self.session_cache.save(LoginSession.from_api(self.api, self.dmm_cookies))
+
+    @classmethod
+    def resume(cls, url, user_id, cookie, token):
+        """
+        用先前取得的遊戲連線資訊直接建立，t 已經失效時回傳 None
+        """
+        from .api import TkrbApi
+
+        api = TkrbApi(url=url, user_id=user_id, cookie=cookie, token=token)
+        try:
+            api.validated = api.start()
+        except APICallFailedException:
             return None
 
         return cls(api)
 
     def init_first(self):
         try:
-            self.api.start()
+            if self.api.validated is None:
+                self.api.start()
+            else:
+                # login/start 已經在確認 t 時呼叫過，只補發事件給剛建立的訂閱者
+                self.api.boardcast("start", decode("start", self.api.validated))
+                self.api.validated = None
             self.home()
             self.api.party_list()
             print(Fore.GREEN + "初始化成功")
@@ -70,11 +150,13 @@ class TkrbClient(object):
                 print("無內番！")
             return
 
+        from .clock import time
+
         jet_lag = timedelta(hours=1)
 
         # JP to TW
         finished_time = make_datetime(data["finished_at"]) - jet_lag
-        now = datetime.now()
+        now = datetime.fromtimestamp(time())
 
         if now >= finished_time:
             try:
@@ -98,59 +180,175 @@ class TkrbClient(object):
         team_ref.make_min_fatigue_be_captain()
         return team_ref
 
+    def sync_if_needed(self):
+        # 隊伍狀態由戰報與編成回應在本地維護，只有偏離時才重新取得
+        if self.user_data.need_resync():
+            self.api.party_list()
+
     # 完成戰鬥前的檢驗，如果可行就回傳 team ref，否則 None
     def _check_before_battle(self, team_id, event=False):
-        self.api.party_list()
+        self.sync_if_needed()
 
         team_ref = self._check_team_status(team_id)
         return team_ref
 
-    def team_sakura(self, episode, field, team_id):
-        for idx in range(1, 7):
-            self.sakura(episode, field, team_id, idx)
+    def team_sakura(self, episode, field, team_id, dry_run=False):
+        team_ref = self.teams[str(team_id)]
+        members = [serial for serial in team_ref.swords.values() if serial]
+        return self.sakura_members(episode, field, team_id, members, dry_run)
 
-    def sakura(self, episode, field, team_id, mem_idx):
-        if int(team_id) < 0 or int(team_id) > 4:
+    def sakura(self, episode, field, team_id, mem_idx, dry_run=False):
+        if int(mem_idx) < 1 or int(mem_idx) > 6:
             return
 
-        if int(mem_idx) < 1 or int(mem_idx) > 6:
+        mem_serial = self.teams[str(team_id)].swords[str(mem_idx)]
+        if not mem_serial:
+            print("沒有這位QQ")
             return
 
-        team_ref = self.teams[str(team_id)]
-        if not team_ref.available:
+        return self.sakura_members(episode, field, team_id, [mem_serial], dry_run)
+
+    def sakura_members(self, episode, field, team_id, members, dry_run=False):
+        """
+        讓 members 全部飄花，出陣的編成與隊長由 SakuraPlanner 規劃，結束後換回原本的編成
+        """
+        from battle.base import BattleResult
+
+        if int(team_id) < 1 or int(team_id) > 4:
+            return
+
+        team_id = str(team_id)
+        team_ref = self.teams[team_id]
+        if team_ref.status != TEAM_NORMAL:
             print("該隊沒空ㄏㄏ")
             return
 
-        mem_serial = team_ref.swords[str(mem_idx)]
-        if not mem_serial:
+        if not members:
             print("沒有這位QQ")
             return
 
+        self.sync_if_needed()
         team_record = team_ref.swords.copy()
-        team_ref.clear()
+        names = {serial: self.user_data.get_sword(serial).name for serial in members}
+
+        planner = SakuraPlanner()
+        fatigues = self.user_data.project_fatigue(normalize(team_record))
+        plan = planner.plan(team_id, team_record, fatigues, members)
+        planner.show(plan, names, fatigues)
+        if dry_run or plan.unfinished:
+            return plan
+
+        # 評價不如預期時會多打幾場，每位最多多出陣一次
+        limit = plan.sorties + len(members)
+        sorties = 0
+        try:
+            while sorties < limit:
+                # 每場的 MVP 無法預測，出陣後以實際的疲勞重新規劃
+                fatigues = self.user_data.project_fatigue(normalize(team_record))
+                step = planner.plan(team_id, team_ref.swords, fatigues, members)
+                if not step.steps or step.unfinished:
+                    break
+
+                if not self.reconfigure({team_id: step.steps[0].lineup}):
+                    break
+
+                status = self.battle(team_id, episode, field, sakura=True)
+                sorties += 1
+                if status is None or status == BattleResult.BE_DEFEATED:
+                    break
+        finally:
+            self.reconfigure({team_id: team_record})
+
+        print(f"飄花共出陣 {sorties} 次")
+        return plan
+
+    def lineups(self):
+        return {team_id: team.swords for team_id, team in self.teams.items()}
+
+    def reconfigure(self, desired):
+        """
+        把 desired({隊伍: 編成}) 中的隊伍改成指定的編成，回傳是否成功
+
+        操作由 lineup.plan_lineups 規劃，已經在正確位置的刀不會再動
+        """
+        swappable = [
+            team_id
+            for team_id, team in self.teams.items()
+            if team.status == TEAM_NORMAL
+        ]
+        try:
+            ops = plan_lineups(self.lineups(), desired, swappable)
+        except ValueError as e:
+            print(Fore.RED + str(e))
+            return False
+
+        for op in ops:
+            try:
+                if op.kind == OP_SWAP:
+                    self.api.swap_team(op.team, op.index)
+                elif op.kind == OP_REMOVE:
+                    self.api.remove_sword(op.team, op.index, op.serial)
+                else:
+                    self.api.set_sword(op.team, op.index, op.serial)
+            except APICallFailedException:
+                print(Fore.RED + f"編成失敗：{op}")
+                self.user_data.mark_dirty()
+                return False
+
+        self.readiness.invalidate()
+        return True
+
+    def pick_team(self):
+        """
+        回傳目前最適合出陣的隊伍編號，沒有可以出陣的隊伍時回傳 None
+        """
+        self.sync_if_needed()
+
+        entry = self.readiness.best()
+        if entry and self.teams[entry.team_id].status == TEAM_CONQUEST:
+            # 遠征時間已到，回本丸領取獎勵後重新同步
+            self.home()
+            self.api.party_list()
+            entry = self.readiness.best()
+            if entry and self.teams[entry.team_id].status == TEAM_CONQUEST:
+                return None
+
+        return entry.team_id if entry else None
 
-        team_ref.set_sword(1, mem_serial)
-        if team_ref.captain_serial_id == mem_serial:
-            print("設置隊長成功")
+    def time_until_ready(self, team_id=None):
+        """
+        距離隊伍可以出陣的秒數，未指定隊伍時為最快的一隊；無法恢復時回傳 None
+        """
+        from .clock import time
+
+        if team_id is None:
+            entry = self.readiness.soonest()
         else:
-            print("這不該是隊長QQ")
-        count = 0
+            entry = self.readiness.get(team_id)
+
+        if entry is None or entry.ready_at is None:
+            return None
+        return max(0.0, entry.ready_at - time())
 
-        while int(team_ref.sword_refs[0].fatigue) < 80 and count < 5:
-            count = count + 1
-            self.battle(team_id, episode, field, sakura=True)
-        for idx in range(1, 7):
-            team_ref.set_sword(idx, team_record[str(idx)])
+    def battle(self, team_id, episode, field, sakura=False, until=None):
+        from battle.base import BattleResult
+
+        if team_id == "auto":
+            team_id = self.pick_team()
+            if team_id is None:
+                return BattleResult.TEAM_STATUS_BAD
 
-    def battle(self, team_id, episode, field, sakura=False):
         team_ref = self._check_before_battle(team_id)
         if not team_ref:
             return None
 
         import battle
 
-        executor = battle.request("common", self.api, team_ref, episode, field, sakura)
-        status = executor.play()
+        executor = battle.request(
+            "common", self.api, team_ref, episode, field, sakura, until=until
+        )
+        status = self._check_until(until, team_ref, executor.play())
+        self._after_sortie(team_ref, status)
         self.home()
         return status
 
@@ -162,8 +360,46 @@ class TkrbClient(object):
         import battle
 
         executor = battle.request("armament", self.api, team_ref, *args, **kwargs)
-        executor.play()
+        status = self._check_until(kwargs.get("until"), team_ref, executor.play())
+        self._after_sortie(team_ref, status)
         self.home()
+        return status
+
+    def _check_until(self, until, team_ref, status):
+        from battle.base import BattleResult
+
+        # 最後一格資源點撿到的資源要到回本丸前才會計入
+        if until and status is BattleResult.NORMAL and until.check(team_ref, {}):
+            return BattleResult.CONDITION_MET
+        return status
+
+    def _stop_conditions(self, options):
+        """
+        -u 指定的停止條件與出陣次數上限；沒有指定 -t 時以 until_max_sorties 為上限
+        """
+        from battle.conditions import StopConditions
+
+        specs = options.get("until")
+        if not specs:
+            return None, int(options.get("-t", 1))
+
+        try:
+            until = StopConditions.parse(specs, self.resources)
+        except ValueError as e:
+            print(Fore.RED + str(e))
+            return None, 0
+
+        if "-t" in options:
+            return until, int(options["-t"])
+        return until, int(battle_config.get("until_max_sorties"))
+
+    def _after_sortie(self, team_ref, status):
+        self.user_data.sorties_since_sync += 1
+        self.readiness.invalidate(team_id=team_ref.id)
+
+        # 出陣途中發生錯誤，無法確定戰報是否完整套用
+        if status is None:
+            self.user_data.mark_dirty()
 
     def list_team(self, list_all=False, team_id=None):
         self.api.party_list()
@@ -177,9 +413,15 @@ class TkrbClient(object):
                 team.show()
 
     def swap_teams(self, team1, team2):
-        try:
-            self.api.swap_team(team1, team2)
-        except APICallFailedException:
+        for team_id in (team1, team2):
+            if self.teams[str(team_id)].status != TEAM_NORMAL:
+                print(Fore.RED + f"第{team_id}部隊無法交換")
+                return
+
+        lineups = self.lineups()
+        if not self.reconfigure(
+            {team1: lineups[str(team2)], team2: lineups[str(team1)]}
+        ):
             print(Fore.RED + f"交換 {team1} 與 {team2} 發生錯誤！")
 
     def list_equipments(self):
@@ -215,18 +457,63 @@ class TkrbClient(object):
             self.list_team(team_id=team)
 
     def handle_battle(self, options):
-        times = int(options["-t"])
-        team_id = int(options["-p"])
+        until, times = self._stop_conditions(options)
+        team_id = options["-p"]
         episode = int(options["episode"])
         field = int(options["field"])
+
+        # -p auto 每次出陣都挑目前最適合的隊伍
+        auto = team_id == "auto"
+        if not auto:
+            team_id = int(team_id)
+
+        # -r on/off 可以覆寫設定檔，紅臉太多時換上替補而不等疲勞恢復
+        rotation = options.get("-r", battle_config.get("bench_rotation"))
+        rotation = rotation not in (False, "off", "0")
+
+        try:
+            return self._battle_loop(
+                times, team_id, episode, field, auto, rotation, until
+            )
+        finally:
+            self.rotation.restore_all()
+
+    def _battle_loop(self, times, team_id, episode, field, auto, rotation, until):
         interval = int(battle_config.get("battle_interval"))
         team_bad_waittime = int(battle_config.get("bad_status_interval"))
 
-        from time import sleep
+        from .clock import time
         from battle.base import BattleResult
 
-        for count in range(times):
-            status = self.battle(team_id, episode, field)
+        count = 0
+        while count < times:
+            if auto:
+                team_id = self.pick_team()
+                if team_id is None:
+                    wait = self.time_until_ready()
+                    if wait is None:
+                        print("沒有隊伍可以出陣")
+                        return None
+
+                    if wait <= 0:
+                        # 時間已到仍無法出陣，本地狀態可能已經過時
+                        self.user_data.mark_dirty()
+                        wait = team_bad_waittime
+
+                    self.readiness.show()
+                    print(f"等待{int(wait)}秒後有隊伍可以出陣...")
+                    self.waiter.wait_until(time() + wait)
+                    continue
+            else:
+                # 隊伍還沒恢復時，先嘗試換上替補，不行再精確地等到可以出陣的時間
+                self.sync_if_needed()
+                if rotation and not self.readiness.get(team_id).is_ready(time()):
+                    self.rotation.rotate(team_id)
+                if not self.waiter.wait_for_team(team_id):
+                    return None
+
+            status = self.battle(team_id, episode, field, until=until)
+            count += 1
 
             if status is None:
                 return None
@@ -235,41 +522,80 @@ class TkrbClient(object):
                 print(status.value)
                 return None
 
+            if status == BattleResult.CONDITION_MET:
+                print(f"{status.value}，共出陣 {count} 次")
+                return status
+
             if status == BattleResult.TEAM_STATUS_BAD:
+                # 下一輪開始前會依照隊伍狀況等待
                 print(status.value)
-                print(f"等待{team_bad_waittime}秒後恢復...")
-                sleep(team_bad_waittime)
                 continue
 
-            if interval > 0.0 and count < times - 1:
-                print(f"等待 {interval} 秒...")
-                sleep(interval)
+            if count < times:
+                # 從上一個請求完成開始計時，不再額外疊加處理時間
+                self.api.pacer.defer(interval)
+
+    def handle_sortie(self, options):
+        from battle.conditions import StopConditions
+
+        targets = []
+        for target in options.get("targets", []):
+            try:
+                until = StopConditions.parse(target["until"], self.resources)
+            except ValueError as e:
+                print(Fore.RED + str(e))
+                return None
+
+            count = target["count"]
+            if count is None:
+                # 只有停止條件時，以 until_max_sorties 為上限
+                count = battle_config.get("until_max_sorties") if until else 1
+
+            targets.append(
+                SortieTarget(
+                    target["team_id"],
+                    target["episode"],
+                    target["field"],
+                    count,
+                    until or None,
+                )
+            )
+        if not targets:
+            return None
+
+        scheduler = SortieScheduler(self, targets)
+        scheduler.run()
+        scheduler.report()
+        return scheduler
 
     def handle_event(self, options):
-        times = int(options["-t"])
+        from battle.base import BattleResult
+
+        until, times = self._stop_conditions(options)
         team_id = int(options["-p"])
         layer = options.get("-l", None)
         interval = int(battle_config.get("battle_interval"))
 
-        from time import sleep
-
         for count in range(times):
-            self.event_battle(team_id, layer=layer)
+            status = self.event_battle(team_id, layer=layer, until=until)
+            if status == BattleResult.CONDITION_MET:
+                print(f"{status.value}，共出陣 {count + 1} 次")
+                return status
 
-            if interval > 0.0 and count < times - 1:
-                print(f"等待 {interval} 秒...")
-                sleep(interval)
+            if count < times - 1:
+                self.api.pacer.defer(interval)
 
     def handle_sakura(self, options):
         team_id = int(options["-p"])
         episode = int(options["episode"])
         field = int(options["field"])
         mem_id = options.get("-m", None)
+        dry_run = options.get("dry_run", False)
 
         if mem_id:
-            self.sakura(episode, field, team_id, mem_id)
+            self.sakura(episode, field, team_id, mem_id, dry_run)
         else:
-            self.team_sakura(episode, field, team_id)
+            self.team_sakura(episode, field, team_id, dry_run)
 
     def handle_forge(self, options):
         subcmd = options.get("subcmd", "")
@@ -290,7 +616,9 @@ class TkrbClient(object):
 
         if action == "clear":
             idx = options.get("party")
-            self.teams[idx].clear()
+            # 第1部隊的隊長不能卸下
+            members = [self.teams[idx].captain_serial_id] if idx == "1" else []
+            self.reconfigure({idx: members})
             return
 
         if action == "member":
@@ -306,6 +634,15 @@ class TkrbClient(object):
             self.swap_teams(team1, team2)
             return
 
+    def handle_lineup(self, options):
+        lineups = options.get("lineups")
+        if not lineups:
+            return
+
+        if self.reconfigure(lineups):
+            for team_id in lineups.keys():
+                self.teams[team_id].show()
+
     def handle_play(self, options):
         file = options.get("filename", None)
         with open(file, "r") as f:
@@ -314,9 +651,39 @@ class TkrbClient(object):
             print(command.strip())
             execute(self, command.strip())
 
+    def handle_stats(self, options):
+        action = options.get("action", None)
+
+        if action == "on":
+            self.api.enable_metrics()
+            print("已開啟 API 統計")
+            return
+
+        if action == "off":
+            self.api.disable_metrics()
+            print("已關閉 API 統計")
+            return
+
+        metrics = self.api.metrics
+        if metrics is None:
+            print("API 統計未開啟，請使用 stats on")
+            return
+
+        if action == "reset":
+            metrics.reset()
+            return
+
+        if action == "export":
+            filename = options.get("filename")
+            metrics.export(filename)
+            print(f"已匯出到 {filename}")
+            return
+
+        metrics.show()
+
     def handle_sleep(self, options):
         sleep_interval = int(options.get("sleeptime", 0))
-        from time import sleep
+        from .clock import sleep
 
         sleep(sleep_interval)
 
@@ -324,8 +691,8 @@ class TkrbClient(object):
 grammer = r"""
     command = mutable / immutable
 
-    immutable = exit / clear / ls / sleep / _
-    mutable = battle / event / sakura / forge / swap / conquest / play / repair
+    immutable = exit / clear / ls / sleep / stats / _
+    mutable = battle / event / sakura / forge / swap / conquest / play / repair / sortie / lineup
 
     string = ~r"\w+"
     integer = ~r"\d+"
@@ -333,12 +700,23 @@ grammer = r"""
 
     field = _ integer "-" integer _
     value_opts = _ value_opts_name _ string _
-    value_opts_name = "-m" / "-p" / "-t" / "-l"
+    value_opts_name = "-m" / "-p" / "-t" / "-l" / "-r"
 
-    battle_opts = field / value_opts+
+    battle_opts = field / dry_run / until_opts / value_opts+
+    until_opts = _ "-u" _ until_cond _
+    until_cond = ~r"[a-z]+(@[1-6])?[:=][0-9]+"
+    dry_run = _ "--dry-run" _
 
     battle = _ "battle" _ battle_opts+
-    event = _ "event" _ value_opts+
+
+    sortie = _ "sortie" _ sortie_target+
+    sortie_target = _ integer ":" integer "-" integer sortie_count? until_opts* _
+    sortie_count = "x" integer
+
+    lineup = _ "lineup" _ lineup_team+
+    lineup_team = _ integer ":" lineup_members? _
+    lineup_members = integer ("," integer)*
+    event = _ "event" _ (until_opts / value_opts)+
     sakura = _ "sakura" _ battle_opts*
     forge = _ "forge" _ subcmd _
     repair = _ "repair" _ subcmd _
@@ -359,6 +737,9 @@ grammer = r"""
 
     sleep = _ "sleep" _ integer _
 
+    stats = _ "stats" _ stats_opts? _
+    stats_opts = "on" / "off" / "reset" / (_ "-o" _ play_opts _)
+
 """
 
 grammer = Grammar(grammer)
@@ -368,7 +749,8 @@ class TkrbExecutor(NodeVisitor):
     def __init__(self):
         super().__init__()
         self.method = None
-        self.options = {"-t": 1, "-p": 1, "episode": 1, "field": 1}
+        # -t 不給預設值，才分得出命令列有沒有指定
+        self.options = {"-p": 1, "episode": 1, "field": 1}
 
     def visit_command(self, node, children):
         return node
@@ -403,6 +785,14 @@ class TkrbExecutor(NodeVisitor):
     def visit_value_opts_name(self, node, children):
         return node.text
 
+    def visit_until_cond(self, node, children):
+        self.options.setdefault("until", []).append(node.text)
+        return node
+
+    def visit_dry_run(self, node, children):
+        self.options["dry_run"] = True
+        return node
+
     def visit_battle_opts(self, node, children):
         if len(children) == 1:
             return children[0]
@@ -466,6 +856,40 @@ class TkrbExecutor(NodeVisitor):
 
         return node
 
+    def visit_sortie(self, node, children):
+        self.method = "sortie"
+        return node
+
+    def visit_sortie_target(self, node, children):
+        _, team, _, episode, _, field, count, _, _ = children
+        count = count[1] if isinstance(count, list) else None
+        # 子節點先被走訪，這個目標後面的 -u 已經收集在 until 裡
+        until = self.options.pop("until", [])
+        self.options.setdefault("targets", []).append(
+            {
+                "team_id": team,
+                "episode": episode,
+                "field": field,
+                "count": count,
+                "until": until,
+            }
+        )
+        return node
+
+    def visit_sortie_count(self, node, children):
+        return children
+
+    def visit_lineup(self, node, children):
+        self.method = "lineup"
+        return node
+
+    def visit_lineup_team(self, node, children):
+        team, _, members = node.text.strip().partition(":")
+        self.options.setdefault("lineups", {})[team] = [
+            serial for serial in members.split(",") if serial
+        ]
+        return node
+
     def visit_conquest(self, node, children):
         self.method = node.expr_name
         return node
@@ -511,6 +935,17 @@ class TkrbExecutor(NodeVisitor):
         self.options["sleeptime"] = children[3]
         return node
 
+    def visit_stats(self, node, children):
+        self.method = "stats"
+        return node
+
+    def visit_stats_opts(self, node, children):
+        if node.text in ("on", "off", "reset"):
+            self.options["action"] = node.text
+        else:
+            self.options["action"] = "export"
+        return node
+
     def generic_visit(self, node, children):
         if not node.expr_name and children:
             if len(children) == 1:
@@ -519,7 +954,9 @@ class TkrbExecutor(NodeVisitor):
         return node
 
 
-def execute(client, command):
+def parse(command):
+    method = opts = None
+
     try:
         root = grammer.parse(command)
     except ParseError as err:
@@ -529,6 +966,14 @@ def execute(client, command):
         visitor = TkrbExecutor()
         try:
             visitor.visit(root)
-            client.execute(visitor.method, visitor.options)
+            method, opts = visitor.method, visitor.options
         except VisitationError as err:
             print(err)
+
+    return method, opts
+
+
+def execute(client, command):
+    method, options = parse(command)
+    if method:
+        client.execute(method, options)
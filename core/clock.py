@@ -0,0 +1,48 @@
+import time as _time
+
+
+class VirtualClock(object):
+    """
+    回放用的時鐘，從記錄開始的時間起算
+
+    sleep 只推進時間不真的等待，回放到某筆記錄時再推進到該筆回應的時間
+    """
+
+    def __init__(self, start):
+        self.now = float(start)
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            self.now += seconds
+
+    def advance_to(self, at):
+        if at > self.now:
+            self.now = at
+
+
+# 為 None 時使用系統時間
+_clock = None
+
+
+def use_clock(clock):
+    """
+    之後的 time()/sleep() 改由 clock 提供，傳入 None 恢復系統時間
+    """
+    global _clock
+    _clock = clock
+
+
+def time():
+    if _clock is None:
+        return _time.time()
+    return _clock.time()
+
+
+def sleep(seconds):
+    if _clock is None:
+        _time.sleep(seconds)
+    else:
+        _clock.sleep(seconds)
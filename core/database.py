@@ -1,15 +1,22 @@
 import sqlite3
+from sys import intern
+from types import MappingProxyType
 
 import attr
 from colorama import Fore
 
+from .clock import time
 from .datatype import Equipment, Sword
 from .notification import Subscriber
+from .preferences import preferences_mgr
+from .roster import RosterStore
 
 DATA_SOURCE_FILENAME = "data.sqlite3"
 
+battle_cfg = preferences_mgr.get("battle")
 
-@attr.s
+
+@attr.s(frozen=True, slots=True)
 class SwordData(object):
     serial = attr.ib(converter=str, default="不明")
     name = attr.ib(converter=str, default="不明")
@@ -26,27 +33,11 @@ class SwordData(object):
 
     @classmethod
     def from_raw(cls, data):
-        return cls(data[0], data[1], data[2], data[3])
-
-
-class SwordDatabase(object):
-    def __init__(self, database=None):
-        self.db = database
-
-    def get(self, key):
-        command = "SELECT * FROM swords WHERE id=?"
-
-        cursor = self.db.cursor()
-        data = cursor.execute(command, (key,)).fetchone()
-        return SwordData.from_raw(data) if data else SwordData.unknown()
-
-    @classmethod
-    def build(cls, file_name):
-        db = sqlite3.connect(f"file:{file_name}?mode=ro", uri=True)
-        return cls(db)
+        # 名稱與刀種重複率很高，共用同一個字串
+        return cls(data[0], intern(data[1]), intern(data[2]), data[3])
 
 
-@attr.s
+@attr.s(frozen=True, slots=True)
 class EquipmentData(object):
     serial = attr.ib(converter=str, default="不明")
     name = attr.ib(converter=str, default="不明")
@@ -62,19 +53,67 @@ class EquipmentData(object):
 
     @classmethod
     def from_raw(cls, data):
-        return cls(data[0], data[1], data[2])
+        return cls(data[0], intern(data[1]), data[2])
+
+
+class MasterDatabase(object):
+    """
+    唯讀的主資料表，建立時一次讀進記憶體，之後的查詢都是字典查找
+
+    查不到的 ID 也會記下來(negative cache)，同一個未知 ID 不會重複處理
+    """
 
+    table = None
+    data_type = None
 
-class EquipmentDatabase(object):
     def __init__(self, database=None):
         self.db = database
+        self._unknown = self.data_type.unknown()
+        self._index = MappingProxyType(self._load() if database else {})
+
+        # 原始 key(字串或整數) -> 結果，包含查不到的 key
+        self._lookup = {}
+
+    def _load(self):
+        cursor = self.db.cursor()
+        rows = cursor.execute(f"SELECT * FROM {self.table}").fetchall()
+        return {row[0]: self.data_type.from_raw(row) for row in rows}
+
+    def __len__(self):
+        return len(self._index)
+
+    def keys(self):
+        return self._index.keys()
 
     def get(self, key):
-        command = "SELECT * FROM equipments WHERE id=?"
+        try:
+            return self._lookup[key]
+        except KeyError:
+            pass
+        except TypeError:
+            return self._unknown
+
+        try:
+            found = self._index.get(int(key), self._unknown)
+        except (TypeError, ValueError):
+            found = self._unknown
+
+        self._lookup[key] = found
+        return found
+
+    @property
+    def unknown_keys(self):
+        return [key for key, value in self._lookup.items() if value is self._unknown]
+
+    def query(self, key):
+        """
+        直接查詢 sqlite，不經過快取
+        """
+        command = f"SELECT * FROM {self.table} WHERE id=?"
 
         cursor = self.db.cursor()
         data = cursor.execute(command, (key,)).fetchone()
-        return EquipmentData.from_raw(data) if data else EquipmentData.unknown()
+        return self.data_type.from_raw(data) if data else self.data_type.unknown()
 
     @classmethod
     def build(cls, file_name):
@@ -82,10 +121,47 @@ class EquipmentDatabase(object):
         return cls(db)
 
 
+class SwordDatabase(MasterDatabase):
+    table = "swords"
+    data_type = SwordData
+
+
+class EquipmentDatabase(MasterDatabase):
+    table = "equipments"
+    data_type = EquipmentData
+
+
 sword_data = SwordDatabase.build(DATA_SOURCE_FILENAME)
 equipment_data = EquipmentDatabase.build(DATA_SOURCE_FILENAME)
 
 
+@attr.s(frozen=True, slots=True)
+class ChangeSet(object):
+    """
+    一次同步裡新增、改變、移除的 serial_id
+    """
+
+    added = attr.ib(converter=frozenset, factory=frozenset)
+    changed = attr.ib(converter=frozenset, factory=frozenset)
+    removed = attr.ib(converter=frozenset, factory=frozenset)
+
+    def __bool__(self):
+        return bool(self.added or self.changed or self.removed)
+
+    @property
+    def touched(self):
+        return self.added | self.changed | self.removed
+
+
+@attr.s(frozen=True, slots=True)
+class LibraryChanges(object):
+    swords = attr.ib()
+    equipments = attr.ib()
+
+    def __bool__(self):
+        return bool(self.swords or self.equipments)
+
+
 class UserLibrary(object):
     def __init__(self, api):
         self.api = api
@@ -93,53 +169,114 @@ class UserLibrary(object):
         # Serial ID 映射到對應的實體
         self.sword_map = {}
         self.equipment_map = {}
+
+        # 數值欄位另外以陣列保存，供整個刀帳的查詢使用
+        self.roster = RosterStore()
+        self.last_changes = None
+
+        # 本地狀態是否與伺服器一致，不一致時下次出陣前要重新取得 party_list
+        self.synced = False
+        self.sorties_since_sync = 0
+
         self.api.registe(
             "party_list", Subscriber("UserLibrary", self.update_from_party_list)
         )
 
-    def get_sword(self, id):
-        return self.sword_map.get(id)
-
-    def get_equipment(self, id):
-        return self.equipment_map.get(id)
+        # 這些操作的結果不在戰報內，只能重新同步
+        for event in ("forge", "repair", "conquest"):
+            self.api.registe(event, Subscriber("UserLibrary", self.mark_dirty))
 
-    def update_data(self, tgt_list, tgt_type, data):
-        for serial, inner_data in data.items():
-            ref = tgt_list.get(serial)
-            if ref:
-                tgt_list[serial] = tgt_type.from_old_one(ref, inner_data)
-            else:
-                tgt_list[serial] = tgt_type.from_json(inner_data)
+    def mark_dirty(self, *args):
+        self.synced = False
 
-    def update_sword(self, serial, new):
-        if serial in self.sword_map.keys() and new is None:
-            del self.sword_map[serial]
-            return
+        # 快取裡的 party_list 也已經過時
+        cache = getattr(self.api, "cache", None)
+        if cache is not None:
+            cache.invalidate(("party_list",))
 
-        if isinstance(new, Sword):
-            self.sword_map[serial] = new
+    def need_resync(self):
+        if not self.synced:
+            return True
 
-    def update_equipment(self, serial, new):
-        if serial in self.equipment_map.keys() and new is None:
-            del self.equipment_map[serial]
-            return
+        interval = int(battle_cfg.get("party_resync_interval", 0))
+        return interval > 0 and self.sorties_since_sync >= interval
 
-        if isinstance(new, Equipment):
-            self.equipment_map[serial] = new
+    def get_sword(self, id):
+        return self.sword_map.get(id)
 
-    def update_swords(self, data):
-        self.sword_map.clear()
-        for serial, innerdata in data.items():
-            self.sword_map[serial] = Sword.from_json(innerdata)
+    def get_equipment(self, id):
+        return self.equipment_map.get(id)
 
-    def update_equipments(self, data):
-        self.equipment_map.clear()
-        for serial, innerdata in data.items():
-            self.equipment_map[serial] = Equipment.from_json(innerdata)
+    def project_fatigue(self, serials=None, now=None):
+        """
+        一次推算多把刀目前的疲勞度，回傳 serial_id -> 疲勞
+
+        serials 為 None 時計算全部的刀，所有刀共用同一個時間點
+        """
+        if now is None:
+            now = time()
+
+        return self.roster.project_fatigue(serials, now)
+
+    def sync_swords(self, swords):
+        """
+        刀的數值就地改變之後，同步到 roster
+        """
+        for sword in swords:
+            if sword:
+                self.roster.update(sword)
+
+    def update_swords(self, entries):
+        sword_map = self.sword_map
+        removed = [serial for serial in sword_map if serial not in entries]
+        for serial in removed:
+            del sword_map[serial]
+            self.roster.remove(serial)
+
+        added = []
+        changed = []
+        for serial, entry in entries.items():
+            sword = sword_map.get(serial)
+            if sword is None:
+                sword = sword_map[serial] = Sword.from_entry(entry)
+                added.append(serial)
+            elif sword.update_from_entry(entry):
+                changed.append(serial)
+            else:
+                continue
+            self.roster.update(sword)
+
+        return ChangeSet(added, changed, removed)
+
+    def update_equipments(self, entries):
+        equipment_map = self.equipment_map
+        removed = [serial for serial in equipment_map if serial not in entries]
+        for serial in removed:
+            del equipment_map[serial]
+
+        added = []
+        changed = []
+        for serial, entry in entries.items():
+            equipment = equipment_map.get(serial)
+            if equipment is None:
+                equipment_map[serial] = Equipment.from_entry(entry)
+                added.append(serial)
+            elif equipment.update_from_entry(entry):
+                changed.append(serial)
+
+        return ChangeSet(added, changed, removed)
+
+    def update_from_party_list(self, model):
+        """
+        只更新有差異的刀與刀裝，改變的部分以 library_changed 事件通知
+        """
+        changes = LibraryChanges(
+            self.update_swords(model.swords), self.update_equipments(model.equipments)
+        )
+        self.last_changes = changes
 
-    def update_from_party_list(self, data):
-        sword_info = data.get("sword")
-        self.update_swords(sword_info)
+        self.synced = True
+        self.sorties_since_sync = 0
 
-        equipment_data = data.get("equip")
-        self.update_equipments(equipment_data)
+        if changes:
+            self.api.boardcast("library_changed", changes)
@@ -1,30 +1,18 @@
 from enum import IntEnum
-from functools import wraps
 
 import attr
 from colorama import Back, Fore
 from prettytable import PrettyTable
 
+from .clock import time
 from .notification import Subscriber
 from .preferences import preferences_mgr
+from .utils import parse_game_time
 
 
 battle_cfg = preferences_mgr.get("battle")
 
 
-def filter_by(key):
-    def decorator(func):
-        @wraps(func)
-        def wrapper(self, data):
-            if data is None or key not in data.keys():
-                return func(self, None)
-            return func(self, data[key])
-
-        return wrapper
-
-    return decorator
-
-
 class Resources(object):
     """
     描述本丸資源
@@ -37,18 +25,24 @@ class Resources(object):
         self.steel = 0  # 玉鋼
         self.coolant = 0  # 冷卻材
         self.file = 0  # 砥石
-        self.api.registe("start", Subscriber("Resource", self.update_from_json))
+        self.api.registe("start", Subscriber("Resource", self.update_from_start))
 
-    @filter_by(key="resource")
-    def update_from_json(self, resource):
+    def update_from_start(self, model):
+        resource = model.resource
         if resource is None:
             return
 
-        self.bill = resource["bill"]
-        self.charcoal = resource["charcoal"]
-        self.steel = resource["steel"]
-        self.coolant = resource["coolant"]
-        self.file = resource["file"]
+        self.bill = resource.bill
+        self.charcoal = resource.charcoal
+        self.steel = resource.steel
+        self.coolant = resource.coolant
+        self.file = resource.file
+
+    def add(self, field, count):
+        """
+        出陣途中撿到的資源，先累加在本地，下次 start 時再以伺服器為準
+        """
+        setattr(self, field, getattr(self, field) + count)
 
     def show(self):
         table = PrettyTable()
@@ -57,10 +51,94 @@ class Resources(object):
         print(table)
 
 
-@attr.s
+FATIGUE_RECOVER_PERIOD = 180
+FATIGUE_RECOVER_POINT = 3
+FATIGUE_RECOVER_LIMIT = 49
+
+
+def project_fatigue(raw_fatigue, recover_time, now):
+    """
+    三分鐘恢復三點，最多自然恢復到 49
+    """
+    if raw_fatigue >= FATIGUE_RECOVER_LIMIT or not recover_time:
+        return raw_fatigue
+
+    times = int((now - recover_time) / FATIGUE_RECOVER_PERIOD)
+    return min(raw_fatigue + times * FATIGUE_RECOVER_POINT, FATIGUE_RECOVER_LIMIT)
+
+
+def fatigue_ready_at(raw_fatigue, recover_time, target):
+    """
+    疲勞自然恢復到 target 的時間(epoch)，已經達到回傳 0，無法靠時間恢復則回傳 None
+    """
+    if raw_fatigue >= target:
+        return 0.0
+
+    if target > FATIGUE_RECOVER_LIMIT or not recover_time:
+        return None
+
+    times = -(-(target - raw_fatigue) // FATIGUE_RECOVER_POINT)
+    return recover_time + times * FATIGUE_RECOVER_PERIOD
+
+
+# 戰鬥評價對疲勞的加減，索引為戰報的 rank
+RANK_FATIGUE_BONUS = (-3, 0, 1, 0, -1, -2, -3)
+
+
+def battle_fatigue_gain(rank, leader=False, mvp=False):
+    """
+    一場戰鬥的疲勞變化
+    MVP： +10
+    隊長： +3
+    S: +1, A: +0, B: -1, C: -2, 敗北: -3
+    """
+    gain = RANK_FATIGUE_BONUS[rank]
+    if mvp:
+        gain += 10
+    if leader:
+        gain += 3
+    return gain
+
+
+# 每次出陣進入戰鬥時扣的疲勞
+SORTIE_FATIGUE_COST = 10
+
+
+def sortie_fatigue(fatigue, rank, leader=False, mvp=False):
+    """
+    出陣打一場戰鬥後的疲勞，與 Sword.battle_init + calculate_battle_fatigue 相同
+    """
+    fatigue = max(0, fatigue - SORTIE_FATIGUE_COST)
+    return min(100, max(0, fatigue + battle_fatigue_gain(rank, leader, mvp)))
+
+
+def make_fatigue_text(fatigue):
+    if fatigue <= Sword.FatigueStatus.RED:
+        return Fore.RED + "過勞" + Fore.RESET
+    elif fatigue <= Sword.FatigueStatus.ORANGE:
+        return Fore.YELLOW + "疲勞" + Fore.RESET
+    elif fatigue <= Sword.FatigueStatus.NORMAL:
+        return "通常"
+    else:
+        return "飄花"
+
+
+HP_STATUS_TEXT = (
+    "正常",
+    "輕傷",
+    Fore.YELLOW + "中傷" + Fore.RESET,
+    Back.WHITE + Fore.RED + "重傷" + Fore.RESET + Back.RESET,
+    "戰線破壞",
+    Back.YELLOW + Fore.BLACK + "刀劍破壞" + Fore.RESET + Back.RESET,
+)
+
+
+@attr.s(slots=True)
 class Sword(object):
     """
     描述玩家身上持有的刀男之詳細訊息
+
+    戰鬥後直接就地更新，不再每場戰鬥為每把刀產生新物件
     """
 
     serial_id = attr.ib()
@@ -77,11 +155,18 @@ class Sword(object):
     equipment2 = attr.ib()
     equipment3 = attr.ib()
     horse = attr.ib()
-    recover_time = attr.ib()
+    # 收到資料時就轉成 epoch，之後計算疲勞不用再解析字串
+    recover_time = attr.ib(converter=parse_game_time)
     action_status = attr.ib(type=int, converter=int)
+    # 刀種，挑選替補時依此分類
+    sword_type = attr.ib(default="不明")
     in_battle = attr.ib(init=False, default=False)
     battle_fatigue = attr.ib(init=False, converter=int, default=-1)
 
+    # hp_flag 的結果，以 (hp, hp_max) 為 key，數值改變時自然失效
+    _hp_flag_key = attr.ib(init=False, default=None, repr=False, eq=False)
+    _hp_flag = attr.ib(init=False, default=None, repr=False, eq=False)
+
     class HPInjuryPercentage(IntEnum):
         MINOR = 90
         MEDIUM = 65
@@ -101,98 +186,116 @@ class Sword(object):
         SAKURA = 100
 
     @classmethod
-    def from_json(cls, data):
+    def from_entry(cls, entry):
         from .database import sword_data
-        sword_id = data.get("sword_id")
-        sword_info = sword_data.get(sword_id)
+
+        sword_info = sword_data.get(entry.sword_id)
 
         return cls(
-            data.get("serial_id"),
-            data.get("sword_id"),
+            entry.serial_id,
+            entry.sword_id,
             sword_info.name,
-            data.get("symbol"),
-            data.get("level"),
-            data.get("protect"),
-            data.get("hp"),
-            data.get("hp_max"),
-            data.get("exp"),
-            data.get("fatigue"),
-            data.get("equip_serial_id1"),
-            data.get("equip_serial_id2"),
-            data.get("equip_serial_id3"),
-            data.get("horse_serial_id"),
-            data.get("recovered_at"),
-            data.get("status"),
+            entry.symbol,
+            entry.level,
+            entry.protect,
+            entry.hp,
+            entry.hp_max,
+            entry.exp,
+            entry.fatigue,
+            entry.equipment1,
+            entry.equipment2,
+            entry.equipment3,
+            entry.horse,
+            entry.recovered_at,
+            entry.status,
+            sword_info.type,
         )
 
-    @classmethod
-    def from_old_one(cls, old, data):
-        return attr.evolve(
-            old,
-            level=data.get("level"),
-            hp=data.get("hp"),
-            exp=data.get("exp"),
-            raw_fatigue=data.get("fatigue"),
-            symbol=data.get("symbol"),
-            equipment1=data.get("equip_serial_id1"),
-            equipment2=data.get("equip_serial_id2"),
-            equipment3=data.get("equip_serial_id3"),
-            horse=data.get("horse_serial_id"),
-            recover_time=data.get("recovered_at"),
-            action_status=data.get("status"),
+    def update_from_entry(self, entry):
+        """
+        以 party_list 的資料就地更新，回傳是否有任何欄位改變
+        """
+        values = (
+            entry.symbol,
+            entry.level,
+            entry.protect,
+            entry.hp,
+            entry.hp_max,
+            entry.exp,
+            entry.fatigue,
+            entry.equipment1,
+            entry.equipment2,
+            entry.equipment3,
+            entry.horse,
+            parse_game_time(entry.recovered_at),
+            entry.status,
+        )
+        current = (
+            self.symbol,
+            self.level,
+            self.protect,
+            self.hp,
+            self.hp_max,
+            self.exp,
+            self.raw_fatigue,
+            self.equipment1,
+            self.equipment2,
+            self.equipment3,
+            self.horse,
+            self.recover_time,
+            self.action_status,
         )
+        if values == current:
+            return False
+
+        (
+            self.symbol,
+            self.level,
+            self.protect,
+            self.hp,
+            self.hp_max,
+            self.exp,
+            self.raw_fatigue,
+            self.equipment1,
+            self.equipment2,
+            self.equipment3,
+            self.horse,
+            self.recover_time,
+            self.action_status,
+        ) = values
+        return True
 
-    def get_new_from_battle_report(self, user_data, data):
-        for i in range(1, 4):
-            equip_serial_id = self.__dict__[f"equipment{i}"]
-            if equip_serial_id is None or len(equip_serial_id) == 0:
+    def update_from_battle_report(self, user_data, data):
+        for i, equip_serial_id in enumerate(self.equipments, 1):
+            if not equip_serial_id:
                 continue
 
-            equip = user_data.get_equipment(equip_serial_id).get_new_from_battle_report(
-                data[f"soldier{i}"]
-            )
-            user_data.update_equipment(equip_serial_id, equip)
-
-        new_one = attr.evolve(
-            self,
-            level=data.get("level"),
-            hp=data.get("hp"),
-            exp=data.get("exp"),
-            raw_fatigue=data.get("fatigue"),
-            symbol=data.get("symbol"),
-            horse=data.get("horse_serial_id"),
-            recover_time=data.get("recovered_at"),
-            action_status=data.get("status"),
-        )
+            equip = user_data.get_equipment(equip_serial_id)
+            if equip:
+                equip.update_soldier(data[f"soldier{i}"])
 
-        new_one.in_battle = self.in_battle
-        new_one.battle_fatigue = self.battle_fatigue
-        return new_one
+        # 戰報不含刀裝編號，刀裝欄位維持原狀
+        self.level = int(data.get("level"))
+        self.hp = int(data.get("hp"))
+        self.exp = int(data.get("exp"))
+        self.raw_fatigue = int(data.get("fatigue"))
+        self.symbol = data.get("symbol")
+        self.horse = data.get("horse_serial_id")
+        self.recover_time = parse_game_time(data.get("recovered_at"))
+        self.action_status = int(data.get("status"))
 
     @property
     def fatigue(self):
-        now_fatigue = int(self.raw_fatigue)
+        return self.fatigue_at(time())
 
+    def fatigue_at(self, now):
+        """
+        推算 now(epoch) 時的疲勞度
+        """
         if self.in_battle and self.battle_fatigue != -1:
             return self.battle_fatigue
 
-        if now_fatigue < Sword.FatigueStatus.NORMAL:
-            if self.recover_time:
-                from datetime import timedelta
-                from .utils import get_datime_diff_from_now
-
-                # 三分鐘恢復一次，計算次數
-                diff = (int)(
-                    get_datime_diff_from_now(self.recover_time) / timedelta(minutes=3)
-                )
-
-                # 時間自動恢復，一次恢復三點
-                real_fatigue = now_fatigue + diff * 3
-                # 最大不超過 normal(49)
-                real_fatigue = min(real_fatigue, (int)(Sword.FatigueStatus.NORMAL))
-                return real_fatigue
-
-        return now_fatigue
+        return project_fatigue(self.raw_fatigue, self.recover_time, now)
 
     @property
     def equipments(self):
@@ -204,17 +307,17 @@ class Sword(object):
 
     @property
     def fatigue_text(self):
-        if self.fatigue <= Sword.FatigueStatus.RED:
-            return Fore.RED + "過勞" + Fore.RESET
-        elif self.fatigue <= Sword.FatigueStatus.ORANGE:
-            return Fore.YELLOW + "疲勞" + Fore.RESET
-        elif self.fatigue <= Sword.FatigueStatus.NORMAL:
-            return "通常"
-        else:
-            return "飄花"
+        return make_fatigue_text(self.fatigue)
 
     @property
     def hp_flag(self):
+        key = (self.hp, self.hp_max)
+        if key != self._hp_flag_key:
+            self._hp_flag = self._calculate_hp_flag()
+            self._hp_flag_key = key
+        return self._hp_flag
+
+    def _calculate_hp_flag(self):
         if int(self.hp) <= 0:
             return Sword.HPStatus.DEAD
 
@@ -230,14 +333,11 @@ class Sword(object):
 
     @property
     def status_text(self):
-        medium = Fore.YELLOW + "中傷" + Fore.RESET
-        serious = Back.WHITE + Fore.RED + "重傷" + Fore.RESET + Back.RESET
-        dead = Back.YELLOW + Fore.BLACK + "刀劍破壞" + Fore.RESET + Back.RESET
-        return ["正常", "輕傷", medium, serious, "戰線破壞", dead][self.hp_flag]
+        return HP_STATUS_TEXT[self.hp_flag]
 
     def battle_init(self):
         self.battle_fatigue = self.fatigue
-        self.battle_fatigue -= 10  # 進入戰鬥就少十點
+        self.battle_fatigue -= SORTIE_FATIGUE_COST  # 進入戰鬥就少十點
         self.battle_fatigue = max(0, self.battle_fatigue)
         self.in_battle = True
 
@@ -249,24 +349,17 @@ class Sword(object):
     def calculate_battle_fatigue(self, rank, leader=False, mvp=False):
         """
         戰鬥結束時對，計算對應的疲勞度
-        MVP： +10
-        隊長： +3
-        S: +1, A: +0, B: -1, C: -2, 敗北: -3
         """
-        if mvp:
-            self.battle_fatigue += 10
-
-        if leader:
-            self.battle_fatigue += 3
-
-        upper = [-3, 0, 1, 0, -1, -2, -3][rank]
-        self.battle_fatigue += upper
+        self.battle_fatigue += battle_fatigue_gain(rank, leader, mvp)
         self.battle_fatigue = max(0, self.battle_fatigue)
         self.battle_fatigue = min(100, self.battle_fatigue)
 
     @property
     def battleable(self):
-        return self.hp_flag not in [Sword.HPStatus.SERIOUS, Sword.HPStatus.DEAD]
+        return self.hp_flag < Sword.HPStatus.SERIOUS
+
+
+TEAM_STATUS_TEXT = ("未開放", "通常", Fore.GREEN + "遠征中" + Fore.RESET, "活動地圖中")
 
 
 class SwordTeam(object):
@@ -282,11 +375,17 @@ class SwordTeam(object):
         self.swords = {}
         self.status = 0
 
+        # 成員物件的快取，只有編成或刀帳成員改變時才重建
+        self._sword_refs = None
+
         sub_name = f"SwordTeam{self.id}"
         self.api.registe("party_list", Subscriber(sub_name, self.build))
         self.api.registe("set_sword", Subscriber(sub_name, self.update_from_set_sword))
         self.api.registe("remove_sword", Subscriber(sub_name, self.handle_remove_sword))
         self.api.registe("swap_team", Subscriber(sub_name, self.handle_swap_team))
+        self.api.registe(
+            "library_changed", Subscriber(sub_name, self.handle_library_changed)
+        )
 
     @property
     def captain_serial_id(self):
@@ -294,11 +393,25 @@ class SwordTeam(object):
 
     @property
     def sword_refs(self):
-        return [self.user_data.get_sword(id) for id in self.swords.values()]
+        if self._sword_refs is None:
+            get_sword = self.user_data.get_sword
+            self._sword_refs = tuple(get_sword(id) for id in self.swords.values())
+        return self._sword_refs
+
+    def invalidate_view(self):
+        self._sword_refs = None
+
+    def handle_library_changed(self, changes):
+        swords = changes.swords
+        members = set(self.swords.values())
+        if not members.isdisjoint(swords.added) or not members.isdisjoint(
+            swords.removed
+        ):
+            self.invalidate_view()
 
     @property
     def status_text(self):
-        return ["未開放", "通常", Fore.GREEN + "遠征中" + Fore.RESET, "活動地圖中"][self.status]
+        return TEAM_STATUS_TEXT[self.status]
 
     @property
     def opened(self):
@@ -316,6 +429,8 @@ class SwordTeam(object):
             print("指定的隊伍正在遠征中！")
             return False
 
+        fatigues = self.fatigues()
+
         red_face_sword = []
         for sword in self.sword_refs:
             # 略過隊伍內空的刀位
@@ -337,10 +452,18 @@ class SwordTeam(object):
                 )
                 return False
 
-            if sword.red_face:
+            if fatigues[sword.serial_id] <= Sword.FatigueStatus.RED:
                 red_face_sword.append(sword.name)
         return True
 
+    def fatigues(self, now=None):
+        """
+        隊伍成員目前的疲勞度，serial_id -> 疲勞
+        """
+        return self.user_data.project_fatigue(
+            [serial for serial in self.swords.values() if serial], now
+        )
+
     def can_foward_in_battle(self):
         """
         檢查每一位成員的狀態是否可以戰鬥
@@ -386,14 +509,18 @@ class SwordTeam(object):
             if not serial_id:
                 return
 
-            old = self.user_data.get_sword(serial_id)
-            new = old.get_new_from_battle_report(self.user_data, slot)
+            sword = self.user_data.get_sword(serial_id)
+            if sword is None:
+                # 戰報裡出現本地不認識的刀，表示本地狀態已經偏離
+                self.user_data.mark_dirty()
+                continue
 
-            self.user_data.update_sword(serial_id, new)
+            sword.update_from_battle_report(self.user_data, slot)
 
             is_leader = idx == "1"
             is_mvp = mvp == slot.get("serial_id")
-            new.calculate_battle_fatigue(rank, leader=is_leader, mvp=is_mvp)
+            sword.calculate_battle_fatigue(rank, leader=is_leader, mvp=is_mvp)
+            self.user_data.sync_swords([sword])
 
         if battle_cfg.get("show_team_info_on_battle", False):
             self.show()
@@ -402,61 +529,65 @@ class SwordTeam(object):
         for i in range(6, 0, -1):
             self.remove(str(i))
 
-    @filter_by(key="party")
-    def build(self, data):
-        data = data.get(str(self.id))
+    def build(self, model):
+        self.invalidate_view()
+
+        party = model.parties.get(str(self.id))
 
-        if not data:
+        if not party:
             return
 
-        self.name = data.get("party_name")
-        for index, s_data in data.get("slot").items():
-            self.swords[index] = s_data.get("serial_id")
-        self.status = int(data.get("status"))
+        self.name = party.name
+        self.swords.update(party.slots)
+        self.status = party.status
 
     def battle_init(self):
-        for sword in self.sword_refs:
+        swords = self.sword_refs
+        for sword in swords:
             if sword:
                 sword.battle_init()
+        self.user_data.sync_swords(swords)
 
     def battle_end(self):
-        for sword in self.sword_refs:
+        swords = self.sword_refs
+        for sword in swords:
             if sword:
                 sword.battle_end()
+        self.user_data.sync_swords(swords)
 
-    def update_from_set_sword(self, data):
-        data = data.get(self.id)
-        for index, s_data in data.get("slot").items():
-            self.update(index, s_data.get("serial_id"))
+    def update_from_set_sword(self, model):
+        self.invalidate_view()
 
-    def handle_remove_sword(self, data):
-        self.swords.clear()
+        party = model.parties.get(self.id)
+        if not party:
+            return
+
+        for index, serial_id in party.slots.items():
+            self.update(index, serial_id)
 
-        team_data = data[self.id]
+    def handle_remove_sword(self, model):
+        self.invalidate_view()
+        self.swords.clear()
 
-        if not team_data or len(team_data) == 0:
+        party = model.parties.get(self.id)
+        if not party:
             return
 
-        for index, s_data in team_data["slot"].items():
-            if s_data:
-                self.swords[index] = s_data.get("serial_id")
-            else:
-                self.swords[index] = None
+        self.swords.update(party.slots)
 
-        self.status = int(data.get("status"))
+        # 回應最外層的 status 是 API 狀態，隊伍狀態要看隊伍本身
+        if party.status is not None:
+            self.status = party.status
 
-    def handle_swap_team(self, data):
+    def handle_swap_team(self, model):
+        self.invalidate_view()
         self.swords.clear()
-        team_data = data[self.id]
 
-        if not team_data or len(team_data) == 0:
+        party = model.parties.get(self.id)
+        if not party:
             return
 
-        for index, s_data in team_data["slot"].items():
-            if s_data:
-                self.swords[index] = s_data.get("serial_id")
-            else:
-                self.swords[index] = None
+        self.swords.update(party.slots)
 
     def show(self):
         print(Fore.YELLOW + f"{self.name}" + " - " + self.status_text)
@@ -464,8 +595,6 @@ class SwordTeam(object):
         if not self.opened:
             return
 
-        total_level = num_sword = 0
-
         table = PrettyTable()
         table.field_names = [
             "順",
@@ -481,16 +610,16 @@ class SwordTeam(object):
         ]
         table.align["名稱"] = table.align["疲勞"] = "l"
 
+        fatigues = self.fatigues()
+
         for index, sword in enumerate(self.sword_refs):
             row = [str(index + 1)]
             if not sword:
                 row += [""] * (len(table.field_names) - 1)
             else:
-                num_sword += 1
-                total_level += sword.level
-
                 hp_text = str(sword.hp) + "/" + str(sword.hp_max)
-                fatigue = sword.fatigue_text + "(" + str(sword.fatigue) + ")"
+                value = fatigues[sword.serial_id]
+                fatigue = make_fatigue_text(value) + "(" + str(value) + ")"
 
                 equipments = [
                     self.user_data.get_equipment(e).name
@@ -510,28 +639,24 @@ class SwordTeam(object):
                 ] + equipments
             table.add_row(row)
 
-        print("平均等級：" + (f"{int(total_level / num_sword)}" if num_sword != 0 else "0"))
+        members = [sword.serial_id for sword in self.sword_refs if sword]
+        average_level = self.user_data.roster.average_level(members)
+        print("平均等級：" + f"{int(average_level)}")
         print(table.get_string(title="f{self.name}"))
 
     def make_min_fatigue_be_captain(self):
-        org_captain_serial_id = self.captain_serial_id
-
-        # 如果是空刀位，設定成 101 讓他最飄花（？）而擺到後面去
-        sorted_swords = sorted(
-            self.sword_refs, key=lambda sword: sword.fatigue if sword else 101
-        )
-
-        if sorted_swords[0].serial_id == org_captain_serial_id:
+        members = [sword.serial_id for sword in self.sword_refs if sword]
+        lowest = self.user_data.roster.lowest_fatigue(time(), members)
+        if not lowest or lowest[0] == self.captain_serial_id:
             return
 
-        ret = self.api.set_sword(
-            team=self.id, index=1, serial=sorted_swords[0].serial_id
-        )
+        captain = self.user_data.get_sword(lowest[0])
+        ret = self.api.set_sword(team=self.id, index=1, serial=captain.serial_id)
         if ret["status"] == 0:
-            print(Fore.YELLOW + f"{sorted_swords[0].name}" + Fore.RESET + " 最為疲勞，成為隊長！")
+            print(Fore.YELLOW + f"{captain.name}" + Fore.RESET + " 最為疲勞，成為隊長！")
 
 
-@attr.s
+@attr.s(slots=True)
 class Equipment(object):
     """
     表示玩家身上持有刀裝的詳細訊息
@@ -549,24 +674,32 @@ class Equipment(object):
             self.is_destroyed = True
 
     @classmethod
-    def from_json(cls, data):
+    def from_entry(cls, entry):
         from .database import equipment_data
-        equip_id = data.get("equip_id")
+
         try:
-            name = equipment_data.get(equip_id).name
+            name = equipment_data.get(entry.equip_id).name
         except AttributeError:
-            print(Fore.RED + f"新道具？ ID: {equip_id}，請聯絡管理者！")
+            print(Fore.RED + f"新道具？ ID: {entry.equip_id}，請聯絡管理者！")
             from sys import exit
 
             exit(1)
 
         return cls(
-            name,
-            data.get("serial_id"),
-            data.get("equip_id"),
-            data.get("priority"),
-            data.get("soldier"),
+            name, entry.serial_id, entry.equip_id, entry.priority, entry.soldier
         )
 
-    def get_new_from_battle_report(self, hp):
-        return attr.evolve(self, soldier=hp)
+    def update_from_entry(self, entry):
+        """
+        以 party_list 的資料就地更新，回傳是否有任何欄位改變
+        """
+        if (self.priority, self.soldier) == (entry.priority, entry.soldier):
+            return False
+
+        self.priority = entry.priority
+        self.update_soldier(entry.soldier)
+        return True
+
+    def update_soldier(self, hp):
+        self.soldier = int(hp)
+        self.is_destroyed = self.soldier <= 0
@@ -9,3 +9,7 @@ class APICallFailedException(APIException):
 
 class LoginFailException(APIException):
     pass
+
+
+class CassetteException(APIException):
+    pass
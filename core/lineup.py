@@ -0,0 +1,323 @@
+from itertools import combinations
+
+import attr
+
+TEAM_SIZE = 6
+
+OP_SET = "set_sword"
+OP_REMOVE = "remove_sword"
+OP_SWAP = "swap_team"
+
+
+@attr.s(slots=True, frozen=True)
+class Operation(object):
+    """
+    編成操作，swap_team 時 team 與 index 分別為兩個隊伍編號
+    """
+
+    kind = attr.ib()
+    team = attr.ib()
+    index = attr.ib()
+    serial = attr.ib(default=None)
+
+    def __str__(self):
+        if self.kind == OP_SWAP:
+            return f"交換第{self.team}與第{self.index}部隊"
+        if self.kind == OP_REMOVE:
+            return f"第{self.team}部隊 {self.index} 號位卸下 {self.serial}"
+        return f"第{self.team}部隊 {self.index} 號位編入 {self.serial}"
+
+
+def normalize(lineup):
+    """
+    {欄位: serial_id} 或序列轉成依序排好、沒有空位的 tuple
+    """
+    if isinstance(lineup, dict):
+        lineup = [lineup[key] for key in sorted(lineup.keys(), key=int)]
+    return tuple(serial for serial in lineup if serial)
+
+
+def _find(state, serial):
+    for team_id, members in state.items():
+        if serial in members:
+            return team_id
+    return None
+
+
+def _apply_set(state, team_id, index, serial):
+    """
+    與伺服器相同的規則：同隊內為交換位置，從別隊拉過來時那一隊會往前補齊
+    """
+    members = state[team_id]
+    pos = index - 1
+    source = _find(state, serial)
+
+    if source == team_id:
+        other = members.index(serial)
+        members[pos], members[other] = members[other], members[pos]
+        return
+
+    if source is not None:
+        state[source].remove(serial)
+
+    if pos < len(members):
+        members[pos] = serial
+    else:
+        members.append(serial)
+
+
+def _apply_swap(state, team1, team2):
+    state[team1], state[team2] = state[team2], state[team1]
+
+
+def _plan_members(state, desired):
+    """
+    貪婪解：逐位編入，最後從最後一個欄位往前卸下多出來的刀，作為搜尋的上限；
+    途中會讓第1部隊沒有刀時回傳 None
+    """
+    ops = []
+    for team_id in sorted(desired.keys(), key=int):
+        for pos, serial in enumerate(desired[team_id]):
+            members = state[team_id]
+            if pos < len(members) and members[pos] == serial:
+                continue
+
+            op = Operation(OP_SET, team_id, pos + 1, serial)
+            if not _legal(state, op):
+                return None
+
+            ops.append(op)
+            _apply_set(state, team_id, pos + 1, serial)
+
+    for team_id in sorted(desired.keys(), key=int):
+        members = state[team_id]
+        # 從最高的欄位卸下，前面的刀不會因補齊而移動
+        while len(members) > len(desired[team_id]):
+            ops.append(Operation(OP_REMOVE, team_id, len(members), members[-1]))
+            members.pop()
+
+    return ops
+
+
+def _first_mismatch(members, wanted):
+    """
+    第一個與目標不同的位置，完全相同時回傳 None
+    """
+    for pos, serial in enumerate(wanted):
+        if pos >= len(members) or members[pos] != serial:
+            return pos
+    return len(wanted) if len(members) > len(wanted) else None
+
+
+def _lower_bound(state, desired):
+    """
+    至少還需要的操作數
+
+    每個 set_sword 最多讓一把刀進到正確的隊伍，並讓兩把多餘的刀離開
+    (被覆蓋的那一把與被拉走的那一隊)；remove_sword 只讓一把離開
+    """
+    missing = extra = 0
+    for team_id, wanted in desired.items():
+        members = set(state[team_id])
+        kept = len(members.intersection(wanted))
+        missing += len(wanted) - kept
+        extra += len(members) - kept
+    return max(missing, -(-extra // 2), -(-(missing + extra) // 3))
+
+
+def _candidates(state, desired, owner):
+    """
+    只在每個目標隊伍第一個不對的位置上考慮操作：
+    編入目標的刀、卸下目前的刀(後面的刀會往前補)、或讓別隊把這把刀拉走
+    """
+    firsts = {
+        team_id: _first_mismatch(state[team_id], wanted)
+        for team_id, wanted in desired.items()
+    }
+
+    for team_id, pos in firsts.items():
+        if pos is None:
+            continue
+
+        members = state[team_id]
+        wanted = desired[team_id]
+        if pos < len(wanted):
+            yield Operation(OP_SET, team_id, pos + 1, wanted[pos])
+
+        if pos >= len(members):
+            continue
+
+        if not (team_id == "1" and len(members) == 1):
+            yield Operation(OP_REMOVE, team_id, pos + 1, members[pos])
+
+        target = owner.get(members[pos])
+        if target is not None and target[0] != team_id:
+            other, other_pos = target
+            if firsts[other] == other_pos:
+                yield Operation(OP_SET, other, other_pos + 1, members[pos])
+
+
+def _apply(state, op):
+    if op.kind == OP_REMOVE:
+        state[op.team].pop(op.index - 1)
+    else:
+        _apply_set(state, op.team, op.index, op.serial)
+
+
+def _legal(state, op):
+    # 第1部隊只剩隊長時不能被拉走
+    if op.kind != OP_SET or op.team == "1":
+        return True
+    return state.get("1") != [op.serial]
+
+
+def _solve(state, desired, nodes, budget):
+    """
+    以 IDA* 在 set_sword / remove_sword 中找最短的操作序列，
+    nodes 為所有搜尋共用的計數，超過上限時退回貪婪解；都找不到時回傳 None
+    """
+    best = _plan_members({k: list(v) for k, v in state.items()}, desired)
+    # 貪婪解不合法時，以每把刀最多一次編入與一次卸下作為搜尋的上限
+    upper = len(best) if best is not None else 2 * TEAM_SIZE * len(state) + 1
+    owner = {
+        serial: (team_id, pos)
+        for team_id, wanted in desired.items()
+        for pos, serial in enumerate(wanted)
+    }
+
+    def search(current, path, limit):
+        nodes[0] += 1
+        if nodes[0] > budget:
+            return None
+
+        if all(
+            tuple(current[team_id]) == wanted for team_id, wanted in desired.items()
+        ):
+            return list(path)
+        if len(path) + _lower_bound(current, desired) > limit:
+            return None
+
+        for op in _candidates(current, desired, owner):
+            if not _legal(current, op):
+                continue
+
+            following = {k: list(v) for k, v in current.items()}
+            _apply(following, op)
+            path.append(op)
+            found = search(following, path, limit)
+            path.pop()
+            if found is not None:
+                return found
+        return None
+
+    for limit in range(_lower_bound(state, desired), upper):
+        found = search(state, [], limit)
+        if found is not None:
+            return found
+        if nodes[0] > budget:
+            break
+    return best
+
+
+def _arrangements(state, swappable):
+    """
+    用 swap_team 能排出的每一種隊伍順序，與所需最少的交換
+    """
+    start = {k: list(v) for k, v in state.items()}
+    seen = {tuple(tuple(start[k]) for k in swappable)}
+    frontier = [([], start)]
+    while frontier:
+        following = []
+        for ops, current in frontier:
+            yield ops, current
+            for team1, team2 in combinations(swappable, 2):
+                swapped = {k: list(v) for k, v in current.items()}
+                _apply_swap(swapped, team1, team2)
+                key = tuple(tuple(swapped[k]) for k in swappable)
+                if key in seen:
+                    continue
+                seen.add(key)
+                following.append((ops + [Operation(OP_SWAP, team1, team2)], swapped))
+        frontier = following
+
+
+def plan_lineups(current, desired, swappable=None, budget=5000):
+    """
+    計算從 current 編成變成 desired 所需最少的操作
+
+    current 為所有隊伍 {隊伍: 編成}，desired 只需要列出要改變的隊伍；
+    swappable 為可以整隊交換的隊伍，預設為全部；budget 為搜尋節點的上限。
+    swap_team 只是把隊伍編號對調，一定可以挪到最前面，
+    所以先列舉整隊交換的結果，再對每一種搜尋 set_sword / remove_sword
+    """
+    state = {str(team_id): list(normalize(v)) for team_id, v in current.items()}
+    desired = {str(team_id): normalize(v) for team_id, v in desired.items()}
+
+    seen = set()
+    for team_id, members in desired.items():
+        if team_id not in state:
+            raise ValueError(f"沒有第{team_id}部隊")
+        if len(members) > TEAM_SIZE:
+            raise ValueError(f"第{team_id}部隊最多只能編入{TEAM_SIZE}把刀")
+        if team_id == "1" and not members:
+            raise ValueError("第1部隊至少要有隊長")
+        if seen.intersection(members) or len(set(members)) != len(members):
+            raise ValueError("同一把刀不能編入兩個位置")
+        seen.update(members)
+
+    # 沒有指定第1部隊時，原本的刀不能全部被編到別隊
+    if "1" in state and "1" not in desired and seen.issuperset(state["1"]):
+        raise ValueError("第1部隊至少要有隊長")
+
+    if swappable is None:
+        swappable = state.keys()
+    swappable = sorted((str(team_id) for team_id in swappable), key=int)
+
+    best = None
+    nodes = [0]
+    for swaps, arranged in _arrangements(state, swappable):
+        if "1" in arranged and not arranged["1"]:
+            # 第1部隊不能沒有隊長
+            continue
+
+        # 被換走但沒有指定的隊伍，必須換回原本的編成(扣掉要編到別隊的刀)
+        pinned = dict(desired)
+        for team_id in swappable:
+            if team_id not in desired and arranged[team_id] != state[team_id]:
+                pinned[team_id] = tuple(
+                    serial for serial in state[team_id] if serial not in seen
+                )
+        if "1" in pinned and not pinned["1"]:
+            continue
+
+        if best is not None and len(swaps) + _lower_bound(arranged, pinned) >= len(
+            best
+        ):
+            continue
+
+        found = _solve(arranged, pinned, nodes, budget)
+        if found is None:
+            continue
+
+        ops = swaps + found
+        if best is None or len(ops) < len(best):
+            best = ops
+
+    if best is None:
+        raise ValueError("無法在第1部隊保留隊長的情況下完成編成")
+    return best
+
+
+def simulate(current, ops):
+    """
+    回傳套用 ops 之後的編成，用來檢查計畫或 dry-run 顯示
+    """
+    state = {str(team_id): list(normalize(v)) for team_id, v in current.items()}
+    for op in ops:
+        if op.kind == OP_SWAP:
+            _apply_swap(state, op.team, op.index)
+        elif op.kind == OP_REMOVE:
+            state[op.team].pop(op.index - 1)
+        else:
+            _apply_set(state, op.team, op.index, op.serial)
+    return {team_id: tuple(members) for team_id, members in state.items()}
@@ -1,13 +1,20 @@
+import json
 import re
 import sys
 import urllib
+from datetime import datetime
+from time import perf_counter
 
+import attr
 import requests
+from colorama import Fore
 from requestium import Keys, Session
 
 from .base import BasicAuthenticator
 from .exceptions import LoginFailException
+from .preferences import preferences_mgr
 
+app_config = preferences_mgr.get("system")
 
 if sys.platform == "win32":
     webdriver_pos = "./chromedriver.exe"
@@ -15,7 +22,89 @@ else:
     webdriver_pos = "./chromedriver"
 
 
-class DMMAuthenticator(BasicAuthenticator):
+@attr.s(slots=True)
+class LoginAttempt(object):
+    """
+    一種登入方式的結果，stages 為 [(階段, 秒數)]，失敗時 error 為原因
+    """
+
+    strategy = attr.ib()
+    stages = attr.ib(factory=list)
+    error = attr.ib(default=None)
+
+    @property
+    def success(self):
+        return self.error is None
+
+    @property
+    def elapsed(self):
+        return sum(seconds for stage, seconds in self.stages)
+
+    def to_dict(self):
+        return {
+            "strategy": self.strategy,
+            "success": self.success,
+            "error": self.error,
+            "elapsed": round(self.elapsed, 3),
+            "stages": {stage: round(seconds, 3) for stage, seconds in self.stages},
+        }
+
+    def __str__(self):
+        stages = "、".join(f"{stage} {seconds:.1f}s" for stage, seconds in self.stages)
+        return f"{self.strategy}：{stages}"
+
+
+class StagedAuthenticator(BasicAuthenticator):
+    """
+    登入流程拆成數個階段，每個階段分別計時，任何階段丟出例外就算失敗
+    """
+
+    name = None
+
+    def stages(self):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def run(self, attempt):
+        for stage, func in self.stages():
+            start = perf_counter()
+            try:
+                func()
+            finally:
+                attempt.stages.append((stage, perf_counter() - start))
+
+    def make_api(self):
+        from .api import TkrbApi
+
+        return TkrbApi(
+            url=self.server_url,
+            user_id=self.user_id,
+            cookie=self.cookie_value,
+            token=self.st,
+        )
+
+    def export_cookies(self):
+        from .session_cache import export_cookies
+
+        return export_cookies(self.session.cookies)
+
+    def login(self):
+        """
+        只用這一種方式登入，同樣經過 LoginChain 計時與記錄
+        """
+        chain = LoginChain(self.dmm_id, self.dmm_pwd, [lambda *args: self])
+        return chain.login()
+
+
+class DMMAuthenticator(StagedAuthenticator):
+    """
+    只使用 requests 的登入流程，不需要瀏覽器
+    """
+
+    name = "http"
+
     def __init__(self, account, password):
         self.urls = {
             "login": "https://accounts.dmm.com/service/login/password",
@@ -132,6 +221,8 @@ class DMMAuthenticator(BasicAuthenticator):
             raise LoginFailException("無法解析 URL")
         url = urllib.parse.unquote(mch.group(1))  # 還原 url encode
         url = re.search("[^#]+", url)[0]
+        if url.startswith("//"):
+            url = "http:" + url
 
         mch = re.search(r"ST\s*: \"(.*)\"", resp.text)
         if not mch:
@@ -150,9 +241,10 @@ class DMMAuthenticator(BasicAuthenticator):
 
     def _login_world(self, st, game_version):
 
-        del self.headers["Host"]
-        del self.headers["Upgrade-Insecure-Requests"]
-        del self.headers["Origin"]
+        # 用 DMM cookie 直接登入時沒有經過 get-token，不一定有 Origin
+        self.headers.pop("Host", None)
+        self.headers.pop("Upgrade-Insecure-Requests", None)
+        self.headers.pop("Origin", None)
 
         payload = {
             "url": "https://www.touken-ranbu.jp/login/",
@@ -210,33 +302,48 @@ class DMMAuthenticator(BasicAuthenticator):
 
         return self.user_id, self.cookie_value, self.st
 
-    def login(self):
-        print("登入刀劍亂舞中...", end="")
+    def _request(self, url, method="GET", data=None):
+        # Host 交給 requests 依網址決定，轉址後才不會帶著錯誤的 Host
+        headers = {k: v for k, v in self.headers.items() if k != "Host"}
+        return self.session.request(
+            method,
+            url,
+            headers=headers,
+            data=data,
+            cookies=self.cookies,
+            proxies=self.proxies,
+        )
 
-        from colorama import Fore
+    def login_with_cookies(self, cookies):
+        """
+        用先前保存的 DMM cookie 直接取得遊戲連線，不開啟瀏覽器；失敗時回傳 None
+        """
+        from .session_cache import import_cookies
 
+        import_cookies(self.session.cookies, cookies)
         try:
-            csrf_token, http_token = self._parse_dmm_token()
-            token, id_hash, pwd_hash = self._parse_get_token(csrf_token, http_token)
-            self._parse_authenticate(token)
             self._login_game()
-            print(Fore.GREEN + "成功")
-        except LoginFailException as e:
-            print(Fore.RED + "失敗")
-            print(e)
+        except (LoginFailException, requests.RequestException, KeyError, ValueError):
             return None
-        else:
-            from .api import TkrbApi
-
-            return TkrbApi(
-                url=self.server_url,
-                user_id=self.user_id,
-                cookie=self.cookie_value,
-                token=self.st,
-            )
 
+        return self.make_api()
+
+    def _login_to_dmm(self):
+        csrf_token, http_token = self._parse_dmm_token()
+        token, id_hash, pwd_hash = self._parse_get_token(csrf_token, http_token)
+        self._parse_authenticate(token)
+
+    def stages(self):
+        return [("dmm", self._login_to_dmm), ("game", self._login_game)]
+
+
+class DMMAuthenticator_v2(StagedAuthenticator):
+    """
+    以 headless Chrome 登入 DMM，cookie 轉移到 session 後立刻關閉瀏覽器
+    """
+
+    name = "browser"
 
-class DMMAuthenticator_v2(BasicAuthenticator):
     def __init__(self, account, password):
         self.urls = {
             "login": "https://accounts.dmm.com/service/login/password",
@@ -261,37 +368,21 @@ class DMMAuthenticator_v2(BasicAuthenticator):
         self.game_version = None
 
     def __del__(self):
-        if self.webdriver:
-            self.webdriver.quit()
+        self.close()
 
-    def login(self):
-        print("登入刀劍亂舞中...", end="")
+    def close(self):
+        if getattr(self, "webdriver", None):
+            self.webdriver.quit()
+            self.webdriver = None
 
-        from colorama import Fore
-
-        try:
-            self._login_to_dmm()
-            self._login_game()
-            print(Fore.GREEN + "成功")
-        except Exception:
-            print(Fore.RED + "失敗")
-        else:
-            from .api import TkrbApi
-
-            return TkrbApi(
-                url=self.server_url,
-                user_id=self.user_id,
-                cookie=self.cookie_value,
-                token=self.st,
-            )
+    def stages(self):
+        return [
+            ("browser", self._login_to_dmm),
+            ("teardown", self.close),
+            ("game", self._login_game),
+        ]
 
     def _login_to_dmm(self):
-        self.session = Session(
-            webdriver_path="./chromedriver.exe",
-            browser="chrome",
-            default_timeout=10,
-            webdriver_options={"arguments": ["headless"]},
-        )
         self.webdriver = self.session.driver
         self.webdriver.get(self.urls.get("login"))
         self.session.transfer_driver_cookies_to_session()
@@ -404,3 +495,81 @@ class DMMAuthenticator_v2(BasicAuthenticator):
         self.cookie_value = h2["cookie_value"]
         self.st = h2["t"]
         return self.user_id, self.cookie_value, self.st
+
+
+class LoginChain(BasicAuthenticator):
+    """
+    依序嘗試 strategies，前一種的任何階段失敗才改用下一種；
+    每次登入的結果與各階段耗時都會附加到 system.login_log
+    """
+
+    strategies = (DMMAuthenticator, DMMAuthenticator_v2)
+
+    def __init__(self, account, password, strategies=None):
+        self.account = account
+        self.password = password
+        if strategies is not None:
+            self.strategies = tuple(strategies)
+
+        self.attempts = []
+        self.authenticator = None
+
+    def login(self):
+        print("登入刀劍亂舞中...", end="")
+
+        for strategy in self.strategies:
+            attempt = LoginAttempt(getattr(strategy, "name", None))
+            self.attempts.append(attempt)
+
+            authenticator = None
+            try:
+                # 例如找不到 chromedriver 時，建立就會失敗，一樣記錄後改用下一種
+                authenticator = strategy(self.account, self.password)
+                attempt.strategy = authenticator.name
+                authenticator.run(attempt)
+            except Exception as e:
+                attempt.error = f"{type(e).__name__}: {e}"
+            finally:
+                if authenticator is not None:
+                    authenticator.close()
+
+            if attempt.success:
+                self.authenticator = authenticator
+                break
+
+        self.record()
+
+        if self.authenticator is None:
+            print(Fore.RED + "失敗")
+            for attempt in self.attempts:
+                print(f"{attempt.strategy}：{attempt.error}")
+            return None
+
+        print(Fore.GREEN + "成功")
+        for attempt in self.attempts:
+            print(
+                attempt if attempt.success else f"{attempt.strategy}：{attempt.error}"
+            )
+        return self.authenticator.make_api()
+
+    def export_cookies(self):
+        if self.authenticator is None:
+            return []
+        return self.authenticator.export_cookies()
+
+    def record(self):
+        filename = app_config.get("login_log")
+        if not filename:
+            return
+
+        entry = {
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "strategy": self.authenticator.name if self.authenticator else None,
+            "elapsed": round(sum(attempt.elapsed for attempt in self.attempts), 3),
+            "attempts": [attempt.to_dict() for attempt in self.attempts],
+        }
+        try:
+            with open(filename, mode="a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        except OSError as e:
+            print(Fore.YELLOW + f"無法寫入登入紀錄：{e}")
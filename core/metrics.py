@@ -0,0 +1,117 @@
+import json
+from bisect import bisect_left
+
+# 以 1.25 倍成長的延遲區間（毫秒），涵蓋 1ms ~ 約 2 分鐘
+BUCKET_BOUNDS = [1.25**i for i in range(53)]
+
+
+class EndpointStats(object):
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.bytes = 0
+        self.status_codes = {}
+        self.buckets = [0] * (len(BUCKET_BOUNDS) + 1)
+
+    def add(self, elapsed_ms, size, status_code):
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.bytes += size
+        self.status_codes[status_code] = self.status_codes.get(status_code, 0) + 1
+        self.buckets[bisect_left(BUCKET_BOUNDS, elapsed_ms)] += 1
+
+    def percentile(self, q):
+        """
+        回傳第 q 百分位所在區間的上界（毫秒）
+        """
+        if self.count == 0:
+            return 0.0
+
+        target = self.count * q / 100.0
+        seen = 0
+        for idx, num in enumerate(self.buckets):
+            seen += num
+            if seen >= target:
+                if idx >= len(BUCKET_BOUNDS):
+                    return self.max_ms
+                return min(BUCKET_BOUNDS[idx], self.max_ms)
+        return self.max_ms
+
+    @property
+    def mean_ms(self):
+        return self.total_ms / self.count if self.count else 0.0
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "bytes": self.bytes,
+            "mean_ms": round(self.mean_ms, 2),
+            "max_ms": round(self.max_ms, 2),
+            "p50_ms": round(self.percentile(50), 2),
+            "p95_ms": round(self.percentile(95), 2),
+            "p99_ms": round(self.percentile(99), 2),
+            "status_codes": {str(k): v for k, v in self.status_codes.items()},
+        }
+
+
+class ApiMetrics(object):
+    """
+    依端點統計 API 的呼叫次數、延遲分布、回應大小與 HTTP 狀態碼
+    """
+
+    def __init__(self):
+        self.endpoints = {}
+
+    def record(self, url, elapsed, size, status_code):
+        stats = self.endpoints.get(url)
+        if stats is None:
+            stats = self.endpoints[url] = EndpointStats()
+        stats.add(elapsed * 1000.0, size, status_code)
+
+    def reset(self):
+        self.endpoints.clear()
+
+    def to_dict(self):
+        return {url: stats.to_dict() for url, stats in sorted(self.endpoints.items())}
+
+    def export(self, filename):
+        with open(filename, mode="w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+    def show(self):
+        if not self.endpoints:
+            print("尚無統計資料")
+            return
+
+        from prettytable import PrettyTable
+
+        table = PrettyTable()
+        table.field_names = [
+            "端點",
+            "次數",
+            "p50(ms)",
+            "p95(ms)",
+            "p99(ms)",
+            "最大(ms)",
+            "位元組",
+            "狀態碼",
+        ]
+        table.align["端點"] = "l"
+
+        for url, stats in sorted(self.endpoints.items()):
+            codes = ",".join(f"{k}:{v}" for k, v in sorted(stats.status_codes.items()))
+            table.add_row(
+                [
+                    url,
+                    stats.count,
+                    f"{stats.percentile(50):.1f}",
+                    f"{stats.percentile(95):.1f}",
+                    f"{stats.percentile(99):.1f}",
+                    f"{stats.max_ms:.1f}",
+                    stats.bytes,
+                    codes,
+                ]
+            )
+        print(table)
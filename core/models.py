@@ -0,0 +1,164 @@
+import attr
+
+
+def _to_int(value):
+    return int(value) if value is not None else None
+
+
+@attr.s(slots=True)
+class ResourceModel(object):
+    bill = attr.ib(converter=int)
+    charcoal = attr.ib(converter=int)
+    steel = attr.ib(converter=int)
+    coolant = attr.ib(converter=int)
+    file = attr.ib(converter=int)
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(
+            data["bill"], data["charcoal"], data["steel"], data["coolant"], data["file"]
+        )
+
+
+@attr.s(slots=True)
+class StartModel(object):
+    resource = attr.ib()
+
+    @classmethod
+    def from_json(cls, data):
+        resource = data.get("resource")
+        return cls(ResourceModel.from_json(resource) if resource else None)
+
+
+@attr.s(slots=True)
+class PartyModel(object):
+    """
+    一個隊伍的編成，slots 為 位置(str) -> serial_id
+    """
+
+    party_no = attr.ib()
+    name = attr.ib()
+    status = attr.ib(converter=_to_int)
+    slots = attr.ib()
+
+    @classmethod
+    def from_json(cls, party_no, data):
+        slots = {}
+        for index, s_data in (data.get("slot") or {}).items():
+            slots[index] = s_data.get("serial_id") if s_data else None
+        return cls(party_no, data.get("party_name"), data.get("status"), slots)
+
+
+def _parse_parties(data):
+    return {
+        key: PartyModel.from_json(key, value)
+        for key, value in data.items()
+        if key.isdigit() and value
+    }
+
+
+@attr.s(slots=True)
+class SwordEntry(object):
+    serial_id = attr.ib()
+    sword_id = attr.ib()
+    symbol = attr.ib()
+    level = attr.ib(converter=int)
+    protect = attr.ib(converter=int)
+    hp = attr.ib(converter=int)
+    hp_max = attr.ib(converter=int)
+    exp = attr.ib(converter=int)
+    fatigue = attr.ib(converter=int)
+    equipment1 = attr.ib()
+    equipment2 = attr.ib()
+    equipment3 = attr.ib()
+    horse = attr.ib()
+    recovered_at = attr.ib()
+    status = attr.ib(converter=int)
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(
+            data.get("serial_id"),
+            data.get("sword_id"),
+            data.get("symbol"),
+            data.get("level"),
+            data.get("protect"),
+            data.get("hp"),
+            data.get("hp_max"),
+            data.get("exp"),
+            data.get("fatigue"),
+            data.get("equip_serial_id1"),
+            data.get("equip_serial_id2"),
+            data.get("equip_serial_id3"),
+            data.get("horse_serial_id"),
+            data.get("recovered_at"),
+            data.get("status"),
+        )
+
+
+@attr.s(slots=True)
+class EquipmentEntry(object):
+    serial_id = attr.ib()
+    equip_id = attr.ib()
+    priority = attr.ib()
+    soldier = attr.ib(converter=int)
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(
+            data.get("serial_id"),
+            data.get("equip_id"),
+            data.get("priority"),
+            data.get("soldier"),
+        )
+
+
+@attr.s(slots=True)
+class PartyListModel(object):
+    parties = attr.ib()
+    swords = attr.ib()
+    equipments = attr.ib()
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(
+            _parse_parties(data.get("party") or {}),
+            {
+                serial: SwordEntry.from_json(value)
+                for serial, value in (data.get("sword") or {}).items()
+            },
+            {
+                serial: EquipmentEntry.from_json(value)
+                for serial, value in (data.get("equip") or {}).items()
+            },
+        )
+
+
+@attr.s(slots=True)
+class PartyUpdateModel(object):
+    """
+    set_sword / remove_sword / swap_team 回傳的各隊編成
+    """
+
+    parties = attr.ib()
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(_parse_parties(data))
+
+
+decoders = {
+    "start": StartModel.from_json,
+    "party_list": PartyListModel.from_json,
+    "set_sword": PartyUpdateModel.from_json,
+    "remove_sword": PartyUpdateModel.from_json,
+    "swap_team": PartyUpdateModel.from_json,
+}
+
+
+def decode(event, data):
+    """
+    每個回應只解析一次，所有訂閱者共用同一個物件；沒有模型的事件直接傳原始資料
+    """
+    decoder = decoders.get(event)
+    return decoder(data) if decoder else data
@@ -0,0 +1,97 @@
+import random
+from time import monotonic, sleep
+
+
+class Pacer(object):
+    """
+    控制同一帳號兩次請求之間的最小間隔，間隔從上一個請求完成時開始計算
+
+    adaptive 開啟時，遇到錯誤回應就加倍間隔，連續成功後再慢慢縮短，
+    逼近伺服器可接受的最小值
+    """
+
+    def __init__(
+        self,
+        spacing=0.0,
+        jitter=0.0,
+        adaptive=False,
+        max_spacing=30.0,
+        step=0.1,
+        success_threshold=20,
+    ):
+        self.spacing = float(spacing)
+        self.min_spacing = self.spacing
+        self.max_spacing = float(max_spacing)
+        self.jitter = float(jitter)
+        self.adaptive = adaptive
+        self.step = float(step)
+        self.success_threshold = success_threshold
+
+        self._ready_at = 0.0
+        self._hold_until = 0.0
+        self._last_done = 0.0
+        self._successes = 0
+
+        self.waited = 0.0
+        self.errors = 0
+
+    def wait(self):
+        """
+        在送出請求前呼叫，必要時等待，回傳實際等待的秒數
+        """
+        delay = max(self._ready_at, self._hold_until) - monotonic()
+        if delay <= 0:
+            return 0.0
+
+        sleep(delay)
+        self.waited += delay
+        return delay
+
+    def done(self, ok=True):
+        """
+        請求完成後呼叫，ok 為 False 表示伺服器回應錯誤
+        """
+        now = monotonic()
+        self._last_done = now
+
+        interval = self.spacing
+        if self.jitter > 0:
+            interval += random.uniform(0, self.jitter)
+        self._ready_at = max(self._ready_at, now) + interval
+
+        if not self.adaptive:
+            return
+
+        if ok:
+            self._successes += 1
+            if self._successes >= self.success_threshold:
+                self._successes = 0
+                self.spacing = max(self.min_spacing, self.spacing - self.step)
+        else:
+            self.penalize()
+
+    def penalize(self):
+        """
+        伺服器拒絕請求時加大間隔
+        """
+        self.errors += 1
+        self._successes = 0
+
+        if self.adaptive:
+            self.spacing = min(self.max_spacing, max(self.spacing * 2, self.step))
+            self._ready_at = max(self._ready_at, monotonic() + self.spacing)
+
+    def defer(self, seconds):
+        """
+        下一個請求至少要在上一個請求完成 seconds 秒之後才送出
+
+        取代原本直接 sleep 的做法，畫面輸出與資料處理的時間會算進等待時間內
+        """
+        if seconds <= 0:
+            return
+
+        self._hold_until = max(self._hold_until, self._last_done + seconds)
+
+    def reset(self):
+        self._ready_at = 0.0
+        self._hold_until = 0.0
@@ -0,0 +1,189 @@
+import attr
+from colorama import Fore
+from prettytable import PrettyTable
+
+from .clock import time
+from .datatype import Sword, fatigue_ready_at
+from .notification import Subscriber
+from .utils import parse_game_time
+
+# 隊伍狀態，對應 SwordTeam.status
+TEAM_LOCKED = 0
+TEAM_NORMAL = 1
+TEAM_CONQUEST = 2
+TEAM_EVENT = 3
+
+# 紅臉最多容許一位
+RED_FACE_ALLOWED = 1
+
+
+@attr.s(slots=True)
+class TeamReadiness(object):
+    """
+    ready_at 為可以出陣的時間(epoch)，None 表示無法靠等待恢復
+    """
+
+    team_id = attr.ib()
+    ready_at = attr.ib()
+    reason = attr.ib(default="")
+
+    def is_ready(self, now):
+        return self.ready_at is not None and self.ready_at <= now
+
+
+class ReadinessIndex(object):
+    """
+    四個隊伍的出陣準備狀態
+
+    每隊的結果是絕對時間，只有編成、刀帳、遠征、手入狀態改變時才重新計算
+    """
+
+    def __init__(self, api, user_data, teams):
+        self.api = api
+        self.user_data = user_data
+        self.teams = teams
+
+        self._entries = {}
+
+        # 隊伍 -> 遠征結束時間、serial_id -> 手入結束時間
+        self.conquest_finish = {}
+        self.repair_finish = {}
+
+        name = "ReadinessIndex"
+        for event in ("party_list", "set_sword", "remove_sword", "swap_team"):
+            self.api.registe(event, Subscriber(name, self.invalidate))
+        self.api.registe("library_changed", Subscriber(name, self.invalidate))
+        self.api.registe("conquest", Subscriber(name, self.invalidate))
+        self.api.registe("repair", Subscriber(name, self.invalidate))
+        self.api.registe("home", Subscriber(name, self.update_from_home))
+        self.api.registe("repair_room", Subscriber(name, self.update_from_repair_room))
+
+    def invalidate(self, *args, team_id=None):
+        if team_id is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(str(team_id), None)
+
+    def update_from_home(self, data):
+        self.conquest_finish = {
+            str(party["party_no"]): parse_game_time(party["finished_at"])
+            for party in (data.get("party") or {}).values()
+            if party.get("finished_at")
+        }
+        self.invalidate()
+
+    def update_from_repair_room(self, data):
+        self.repair_finish = {
+            repair["sword_serial_id"]: parse_game_time(repair["finished_at"])
+            for repair in (data.get("repair") or {}).values()
+        }
+        self.invalidate()
+
+    def get(self, team_id):
+        team_id = str(team_id)
+        entry = self._entries.get(team_id)
+        if entry is None:
+            entry = self._entries[team_id] = self._evaluate(self.teams[team_id])
+        return entry
+
+    def entries(self):
+        return [self.get(team_id) for team_id in self.teams.keys()]
+
+    def _evaluate(self, team):
+        if team.status == TEAM_LOCKED:
+            return TeamReadiness(team.id, None, "未開放")
+
+        if team.status == TEAM_CONQUEST:
+            return TeamReadiness(team.id, self.conquest_finish.get(team.id), "遠征中")
+
+        if team.status == TEAM_EVENT:
+            return TeamReadiness(team.id, None, "活動地圖中")
+
+        members = [sword for sword in team.sword_refs if sword]
+        if not members:
+            return TeamReadiness(team.id, None, "沒有隊員")
+
+        now = time()
+        ready_at = 0.0
+        reason = ""
+
+        for sword in members:
+            if sword.battleable:
+                continue
+
+            finished = self.repair_finish.get(sword.serial_id)
+            if finished is None:
+                return TeamReadiness(team.id, None, f"{sword.name} 需要手入")
+
+            if finished > ready_at:
+                ready_at, reason = finished, "手入中"
+
+        # 紅臉恢復到 RED + 1 的時間，容許的人數以內不用等
+        target = int(Sword.FatigueStatus.RED) + 1
+        red_ready = sorted(
+            (
+                fatigue_ready_at(sword.raw_fatigue, sword.recover_time, target)
+                for sword in members
+                if sword.fatigue_at(now) < target
+            ),
+            key=lambda t: float("inf") if t is None else t,
+            reverse=True,
+        )
+        if len(red_ready) > RED_FACE_ALLOWED:
+            waiting = red_ready[RED_FACE_ALLOWED]
+            if waiting is None:
+                return TeamReadiness(team.id, None, "紅臉無法恢復")
+            if waiting > ready_at:
+                ready_at, reason = waiting, "紅臉"
+
+        return TeamReadiness(team.id, ready_at, reason)
+
+    def ready_teams(self, now=None):
+        now = time() if now is None else now
+        return [entry for entry in self.entries() if entry.is_ready(now)]
+
+    def best(self, now=None):
+        """
+        目前可以出陣的隊伍中，疲勞最不吃緊的一隊；沒有則回傳 None
+        """
+        now = time() if now is None else now
+        ready = self.ready_teams(now)
+        if not ready:
+            return None
+
+        def score(entry):
+            fatigues = self.teams[entry.team_id].fatigues(now)
+            return min(fatigues.values(), default=0), -int(entry.team_id)
+
+        return max(ready, key=score)
+
+    def soonest(self):
+        """
+        最快可以出陣的隊伍，全部都無法恢復時回傳 None
+        """
+        waiting = [entry for entry in self.entries() if entry.ready_at is not None]
+        if not waiting:
+            return None
+        return min(waiting, key=lambda entry: (entry.ready_at, int(entry.team_id)))
+
+    def show(self):
+        now = time()
+
+        table = PrettyTable()
+        table.field_names = ["隊伍", "狀態", "可出陣", "原因"]
+        for entry in self.entries():
+            if entry.ready_at is None:
+                when = Fore.RED + "無法" + Fore.RESET
+            elif entry.is_ready(now):
+                when = Fore.GREEN + "現在" + Fore.RESET
+            else:
+                when = f"{int(entry.ready_at - now)} 秒後"
+            table.add_row(
+                [
+                    entry.team_id,
+                    self.teams[entry.team_id].status_text,
+                    when,
+                    entry.reason,
+                ]
+            )
+        print(table)
@@ -0,0 +1,174 @@
+import numpy as np
+
+from .datatype import (
+    FATIGUE_RECOVER_LIMIT,
+    FATIGUE_RECOVER_PERIOD,
+    FATIGUE_RECOVER_POINT,
+    Sword,
+)
+
+INT_COLUMNS = (
+    "level",
+    "hp",
+    "hp_max",
+    "exp",
+    "raw_fatigue",
+    "action_status",
+    "kind",
+)
+
+# 刀種字串 -> kind 欄位裡的代碼
+_TYPE_CODES = {}
+
+
+def type_code(sword_type):
+    code = _TYPE_CODES.get(sword_type)
+    if code is None:
+        code = _TYPE_CODES[sword_type] = len(_TYPE_CODES)
+    return code
+
+
+class RosterStore(object):
+    """
+    以欄位陣列保存所有刀的數值，整個刀帳的查詢不需要逐一走訪物件
+
+    每把刀佔一列，serial_id -> 列的對照放在 index；
+    battle_fatigue 為 -1 表示不在戰鬥中，kind 為 type_code 轉換後的刀種
+    """
+
+    def __init__(self, capacity=256):
+        self.index = {}
+        self.size = 0
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        self.serials = np.empty(capacity, dtype=object)
+        for name in INT_COLUMNS:
+            setattr(self, name, np.zeros(capacity, dtype=np.int64))
+        self.recover_time = np.full(capacity, np.nan)
+        self.battle_fatigue = np.full(capacity, -1, dtype=np.int64)
+
+    def _grow(self):
+        capacity = len(self.serials) * 2
+        for name in ("serials", "recover_time", "battle_fatigue") + INT_COLUMNS:
+            # 新增的列會在 update 時整列覆寫
+            setattr(self, name, np.resize(getattr(self, name), capacity))
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, serial):
+        return serial in self.index
+
+    def clear(self):
+        self.index.clear()
+        self.size = 0
+
+    def rebuild(self, swords):
+        self.clear()
+        for sword in swords:
+            self.update(sword)
+
+    def update(self, sword):
+        row = self.index.get(sword.serial_id)
+        if row is None:
+            if self.size == len(self.serials):
+                self._grow()
+            row = self.size
+            self.size += 1
+            self.index[sword.serial_id] = row
+            self.serials[row] = sword.serial_id
+
+        self.level[row] = sword.level
+        self.hp[row] = sword.hp
+        self.hp_max[row] = sword.hp_max
+        self.exp[row] = sword.exp
+        self.raw_fatigue[row] = sword.raw_fatigue
+        self.action_status[row] = sword.action_status
+        self.kind[row] = type_code(sword.sword_type)
+        self.recover_time[row] = (
+            sword.recover_time if sword.recover_time is not None else np.nan
+        )
+        self.battle_fatigue[row] = sword.battle_fatigue if sword.in_battle else -1
+
+    def remove(self, serial):
+        row = self.index.pop(serial, None)
+        if row is None:
+            return
+
+        # 用最後一列補上空位
+        last = self.size - 1
+        if row != last:
+            for name in ("serials", "recover_time", "battle_fatigue") + INT_COLUMNS:
+                column = getattr(self, name)
+                column[row] = column[last]
+            self.index[self.serials[row]] = row
+        self.serials[last] = None
+        self.size = last
+
+    def rows(self, serials=None):
+        if serials is None:
+            return np.arange(self.size)
+
+        index = self.index
+        return np.fromiter(
+            (index[serial] for serial in serials if serial in index), dtype=np.int64
+        )
+
+    def fatigue(self, now, rows=None):
+        """
+        推算 now(epoch) 時每一列的疲勞度
+        """
+        if rows is None:
+            rows = slice(0, self.size)
+
+        raw = self.raw_fatigue[rows]
+        recover = self.recover_time[rows]
+        in_battle = self.battle_fatigue[rows]
+
+        elapsed = np.nan_to_num(now - recover)
+        times = np.trunc(elapsed / FATIGUE_RECOVER_PERIOD).astype(np.int64)
+        projected = np.minimum(
+            raw + times * FATIGUE_RECOVER_POINT, FATIGUE_RECOVER_LIMIT
+        )
+
+        recovering = (raw < FATIGUE_RECOVER_LIMIT) & ~np.isnan(recover)
+        fatigue = np.where(recovering, projected, raw)
+        return np.where(in_battle != -1, in_battle, fatigue)
+
+    def project_fatigue(self, serials=None, now=None):
+        rows = self.rows(serials)
+        values = self.fatigue(now, rows)
+        return dict(zip(self.serials[rows].tolist(), values.tolist()))
+
+    def hp_flags(self, rows=None):
+        """
+        與 Sword.hp_flag 相同的分級，一次算完
+        """
+        if rows is None:
+            rows = slice(0, self.size)
+
+        hp = self.hp[rows]
+        percent = hp * 100.0 / np.maximum(self.hp_max[rows], 1)
+
+        flags = np.full(len(hp), int(Sword.HPStatus.SERIOUS), dtype=np.int64)
+        flags[percent >= int(Sword.HPInjuryPercentage.SERIOUS)] = Sword.HPStatus.MEDIUM
+        flags[percent >= int(Sword.HPInjuryPercentage.MEDIUM)] = Sword.HPStatus.MINOR
+        flags[percent >= int(Sword.HPInjuryPercentage.MINOR)] = Sword.HPStatus.NORMAL
+        flags[hp <= 0] = Sword.HPStatus.DEAD
+        return flags
+
+    def lowest_fatigue(self, now, serials=None, count=1):
+        rows = self.rows(serials)
+        if len(rows) == 0:
+            return []
+
+        values = self.fatigue(now, rows)
+        order = np.argsort(values, kind="stable")[:count]
+        return self.serials[rows[order]].tolist()
+
+    def average_level(self, serials=None):
+        rows = self.rows(serials)
+        if len(rows) == 0:
+            return 0.0
+        return float(self.level[rows].mean())
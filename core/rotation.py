@@ -0,0 +1,171 @@
+import numpy as np
+from colorama import Fore
+
+from .clock import time
+from .datatype import Sword
+from .preferences import preferences_mgr
+from .readiness import RED_FACE_ALLOWED
+from .roster import type_code
+
+battle_config = preferences_mgr.get("battle")
+
+# 刀的 action_status，0 為待命中
+SWORD_IDLE = 0
+
+
+class BenchRotation(object):
+    """
+    隊伍裡紅臉或受傷的刀太多時，從沒有編入隊伍的刀中挑選替補
+
+    替補以同刀種、等級相近、疲勞最高者優先，編成變更都交給 client.reconfigure；
+    換下來的原始編成記在 saved，restore 時換回去
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.level_band = int(battle_config.get("rotation_level_band"))
+
+        # 隊伍編號 -> 輪替前的 {欄位: serial_id}
+        self.saved = {}
+
+    @property
+    def roster(self):
+        return self.client.user_data.roster
+
+    def _busy_serials(self):
+        busy = set(self.client.readiness.repair_finish.keys())
+        for team in self.client.teams.values():
+            busy.update(serial for serial in team.swords.values() if serial)
+        return busy
+
+    def _idle_mask(self, now):
+        """
+        可以當替補的列：不在任何隊伍、待命中、血量可以出陣、不是紅臉
+        """
+        roster = self.roster
+        size = len(roster)
+
+        mask = np.ones(size, dtype=bool)
+        mask[roster.rows(self._busy_serials())] = False
+        mask &= roster.action_status[:size] == SWORD_IDLE
+        mask &= roster.hp_flags() < int(Sword.HPStatus.SERIOUS)
+
+        fatigue = roster.fatigue(now)
+        mask &= fatigue > int(Sword.FatigueStatus.RED)
+        return mask, fatigue
+
+    def _benched(self, team, now):
+        """
+        需要換下的刀：所有無法出陣的刀，以及超過容許人數的紅臉(最疲勞的先換)
+        """
+        fatigues = team.fatigues(now)
+        benched = []
+        red = []
+        for idx in range(1, 7):
+            serial = team.swords[str(idx)]
+            if not serial:
+                continue
+
+            sword = self.client.user_data.get_sword(serial)
+            if not sword.battleable:
+                benched.append((idx, sword))
+            elif fatigues[serial] <= int(Sword.FatigueStatus.RED):
+                red.append((idx, sword))
+
+        red.sort(key=lambda item: fatigues[item[1].serial_id])
+        benched.extend(red[: max(0, len(red) - RED_FACE_ALLOWED)])
+        return benched
+
+    def _pick(self, sword, mask, fatigue):
+        """
+        依序以同刀種且等級相近、不限刀種但等級相近找替補，回傳列或 None
+        """
+        roster = self.roster
+        size = len(roster)
+
+        level = roster.level[:size]
+        in_band = mask & (np.abs(level - sword.level) <= self.level_band)
+        same_kind = roster.kind[:size] == type_code(sword.sword_type)
+
+        for candidates in (in_band & same_kind, in_band):
+            rows = np.flatnonzero(candidates)
+            if len(rows) == 0:
+                continue
+
+            # 疲勞最高者優先，同疲勞取等級最接近的
+            order = np.lexsort((np.abs(level[rows] - sword.level), -fatigue[rows]))
+            return rows[order[0]]
+        return None
+
+    def plan(self, team_id, now=None):
+        """
+        回傳 [(欄位, 換下的刀, 替補的 serial_id)]，找不到替補的刀會略過
+        """
+        now = time() if now is None else now
+        team = self.client.teams[str(team_id)]
+
+        benched = self._benched(team, now)
+        if not benched:
+            return []
+
+        mask, fatigue = self._idle_mask(now)
+        plan = []
+        for idx, sword in benched:
+            row = self._pick(sword, mask, fatigue)
+            if row is None:
+                continue
+
+            mask[row] = False
+            plan.append((idx, sword, self.roster.serials[row]))
+        return plan
+
+    def rotate(self, team_id):
+        """
+        換上替補，回傳實際更換的數量
+        """
+        team_id = str(team_id)
+        team = self.client.teams[team_id]
+
+        plan = self.plan(team_id)
+        if not plan:
+            return 0
+
+        original = team.swords.copy()
+        lineup = original.copy()
+        for idx, sword, serial in plan:
+            lineup[str(idx)] = serial
+
+        # 先記下原本的編成，途中失敗時結束後也會嘗試換回去
+        self.saved.setdefault(team_id, original)
+        if not self.client.reconfigure({team_id: lineup}):
+            return 0
+
+        for idx, sword, serial in plan:
+            replacement = self.client.user_data.get_sword(serial)
+            print(
+                Fore.YELLOW
+                + sword.name
+                + Fore.RESET
+                + f" 休息，由 {replacement.name} 替補"
+            )
+        return len(plan)
+
+    def restore(self, team_id):
+        self._restore([str(team_id)])
+
+    def restore_all(self):
+        self._restore(list(self.saved.keys()))
+
+    def _restore(self, team_ids):
+        lineups = {
+            team_id: self.saved.pop(team_id)
+            for team_id in team_ids
+            if team_id in self.saved
+        }
+        if not lineups:
+            return
+
+        # 所有隊伍一起規劃，換下的刀若被編進別隊也能直接拉回來
+        if self.client.reconfigure(lineups):
+            for team_id in lineups.keys():
+                print(f"第{team_id}部隊已恢復原本的編成")
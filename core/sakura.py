@@ -0,0 +1,200 @@
+from math import ceil
+
+import attr
+from colorama import Fore
+from prettytable import PrettyTable
+
+from .datatype import make_fatigue_text, sortie_fatigue
+from .lineup import normalize, plan_lineups
+
+# 飄花的目標疲勞度
+SAKURA_TARGET = 80
+
+# 規劃時假設每場都是 S 勝利
+SAKURA_RANK = 2
+
+
+@attr.s(slots=True, frozen=True)
+class SakuraStep(object):
+    """
+    一次出陣：lineup[0] 為隊長，expected 為出陣後預期的疲勞度
+    """
+
+    lineup = attr.ib()
+    expected = attr.ib()
+
+    @property
+    def captain(self):
+        return self.lineup[0]
+
+
+@attr.s(slots=True, frozen=True)
+class SakuraPlan(object):
+    steps = attr.ib()
+    lineup_ops = attr.ib()
+    # 整隊出陣到剩下幾位還沒飄花時，改為單獨出陣
+    solo_below = attr.ib()
+    # 出陣上限內無法飄花的刀
+    unfinished = attr.ib(default=())
+
+    @property
+    def sorties(self):
+        return len(self.steps)
+
+
+def sortie_fatigues(lineup, fatigues, rank=SAKURA_RANK):
+    """
+    依照 sortie_fatigue 推算一次出陣後每位的疲勞
+
+    單獨出陣時隊長一定是 MVP；多人時 MVP 無法控制，以 1/人數 的機率取期望值
+    """
+    share = 1 / len(lineup)
+    expected = {}
+    for idx, serial in enumerate(lineup):
+        leader = idx == 0
+        without = sortie_fatigue(fatigues[serial], rank, leader)
+        with_mvp = sortie_fatigue(fatigues[serial], rank, leader, mvp=True)
+        expected[serial] = without + (with_mvp - without) * share
+    return expected
+
+
+def solo_sorties(fatigue, target=SAKURA_TARGET, rank=SAKURA_RANK):
+    """
+    只靠單獨出陣達到目標需要的次數，用來與規劃結果比較；無法達到時回傳 None
+    """
+    count = 0
+    while fatigue < target:
+        following = sortie_fatigue(fatigue, rank, leader=True, mvp=True)
+        if following <= fatigue:
+            return None
+        fatigue = following
+        count += 1
+    return count
+
+
+class SakuraPlanner(object):
+    """
+    讓一組刀劍男士全部飄花
+
+    每次出陣都先扣 SORTIE_FATIGUE_COST，再加上評價、隊長與 MVP 的疲勞；
+    整隊出陣時 MVP 大家分，單獨出陣時隊長加 MVP 一次拿滿。
+    每種切換點都模擬一遍，取出陣次數最少、編成操作最少的計畫；
+    實際執行時每場出陣後都以真實的疲勞重新規劃
+    """
+
+    def __init__(self, target=SAKURA_TARGET, rank=SAKURA_RANK):
+        self.target = target
+        self.rank = rank
+
+    def _captain_first(self, members, fatigues, previous):
+        # 與 make_min_fatigue_be_captain 相同：最疲勞的刀與 1 號位交換，其餘維持原本的順序
+        order = {serial: idx for idx, serial in enumerate(previous)}
+        members = sorted(members, key=lambda serial: order.get(serial, len(order)))
+        captain = min(members, key=lambda serial: fatigues[serial])
+        pos = members.index(captain)
+        members[0], members[pos] = members[pos], members[0]
+        return tuple(members)
+
+    def _simulate(self, fatigues, lineup, members, solo_below, limit):
+        fatigues = dict(fatigues)
+        previous = lineup
+        steps = []
+
+        while len(steps) < limit:
+            needing = [serial for serial in members if fatigues[serial] < self.target]
+            if not needing:
+                break
+
+            if len(needing) > solo_below:
+                sortie = self._captain_first(needing, fatigues, previous)
+            elif len(previous) == 1 and previous[0] in needing:
+                # 單獨出陣時同一位打到飄花再換人，編成操作最少
+                sortie = previous
+            else:
+                sortie = (min(needing, key=lambda serial: fatigues[serial]),)
+
+            fatigues.update(sortie_fatigues(sortie, fatigues, self.rank))
+
+            steps.append(SakuraStep(sortie, dict(fatigues)))
+            previous = sortie
+        return steps
+
+    def _lineup_ops(self, team_id, lineup, steps):
+        count = 0
+        previous = lineup
+        for following in [step.lineup for step in steps] + [lineup]:
+            ops = plan_lineups({team_id: previous}, {team_id: following}, ())
+            count += len(ops)
+            previous = following
+        return count
+
+    def _cost(self, plan):
+        # 出陣上限內無法讓全部飄花的計畫排在最後
+        return len(plan.unfinished), plan.sorties, plan.lineup_ops
+
+    def sortie_limit(self, fatigues, members):
+        """
+        出陣次數上限：全部單獨出陣所需的次數，無法達到目標的刀不計
+        """
+        counts = [
+            solo_sorties(fatigues[serial], self.target, self.rank) for serial in members
+        ]
+        return sum(count for count in counts if count)
+
+    def plan(self, team_id, lineup, fatigues, members=None):
+        """
+        lineup 為目前的編成，fatigues 為每位目前的疲勞度；
+        members 為要飄花的刀，預設為整隊，結束後都會換回 lineup
+        """
+        lineup = normalize(lineup)
+        members = lineup if members is None else tuple(members)
+        limit = self.sortie_limit(fatigues, members)
+
+        best = None
+        for solo_below in range(len(members) + 1):
+            steps = self._simulate(fatigues, lineup, members, solo_below, limit)
+            final = steps[-1].expected if steps else fatigues
+            plan = SakuraPlan(
+                tuple(steps),
+                self._lineup_ops(team_id, lineup, steps),
+                solo_below,
+                tuple(serial for serial in members if final[serial] < self.target),
+            )
+            if best is None or self._cost(plan) < self._cost(best):
+                best = plan
+        return best
+
+    def show(self, plan, names, fatigues):
+        """
+        names 為要飄花的刀 serial_id -> 名稱
+        """
+        table = PrettyTable()
+        table.field_names = ["次", "隊長", "隊員", "預期疲勞"]
+        for idx, step in enumerate(plan.steps, 1):
+            table.add_row(
+                [
+                    idx,
+                    names[step.captain],
+                    "、".join(names[serial] for serial in step.lineup[1:]) or "-",
+                    "、".join(
+                        f"{names[serial]}({int(step.expected[serial])})"
+                        for serial in step.lineup
+                    ),
+                ]
+            )
+        print(table)
+
+        baseline = self.sortie_limit(fatigues, names.keys())
+        print(
+            f"預計出陣 {plan.sorties} 次、編成操作 {plan.lineup_ops} 次"
+            f"(逐一單獨出陣約需 {baseline} 次)"
+        )
+        for serial in names.keys():
+            final = plan.steps[-1].expected[serial] if plan.steps else fatigues[serial]
+            print(f"{names[serial]}：{make_fatigue_text(int(final))}({int(final)})")
+        if plan.unfinished:
+            print(
+                Fore.RED
+                + "、".join(names[serial] for serial in plan.unfinished)
+                + " 單獨出陣也無法飄花"
+            )
@@ -0,0 +1,206 @@
+import json
+import os
+from hashlib import sha256
+from pathlib import Path
+from time import time
+
+import attr
+import requests
+
+from .exceptions import APICallFailedException
+from .preferences import preferences_mgr
+
+app_config = preferences_mgr.get("system")
+
+KDF_ITERATIONS = 200000
+
+
+@attr.s(slots=True)
+class LoginSession(object):
+    """
+    登入後可以重複使用的連線資訊
+
+    dmm_cookies 為 DMM 登入後的 cookie，t 失效時可以不開瀏覽器重新取得遊戲連線
+    """
+
+    server_url = attr.ib()
+    user_id = attr.ib()
+    cookie_value = attr.ib()
+    token = attr.ib()
+    dmm_cookies = attr.ib(factory=list)
+    saved_at = attr.ib(factory=time)
+
+    @classmethod
+    def from_api(cls, api, dmm_cookies=None):
+        return cls(
+            server_url=api.server_url,
+            user_id=api.user_id,
+            cookie_value=api.payload["sword"],
+            token=api.payload["t"],
+            dmm_cookies=list(dmm_cookies or []),
+        )
+
+    def make_api(self):
+        from .api import TkrbApi
+
+        return TkrbApi(
+            url=self.server_url,
+            user_id=self.user_id,
+            cookie=self.cookie_value,
+            token=self.token,
+        )
+
+
+def export_cookies(jar):
+    return [
+        {
+            "name": cookie.name,
+            "value": cookie.value,
+            "domain": cookie.domain,
+            "path": cookie.path,
+        }
+        for cookie in jar
+    ]
+
+
+def import_cookies(jar, cookies):
+    for cookie in cookies:
+        jar.set(
+            cookie["name"],
+            cookie["value"],
+            domain=cookie["domain"],
+            path=cookie["path"],
+        )
+
+
+class SessionCache(object):
+    """
+    以帳號密碼加密保存 LoginSession，每個帳號一筆
+
+    金鑰由密碼以 PBKDF2 導出，內容用 AES-GCM 加密；
+    密碼不對或檔案被改過時解密失敗，當作沒有快取
+    """
+
+    def __init__(self, path, account, password):
+        self.path = Path(path)
+        self.account = account
+        self.password = password
+        self.entry_id = sha256(account.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def open(cls, account, password):
+        """
+        依照 system.session_cache 建立，設定為空時回傳 None
+        """
+        path = app_config.get("session_cache")
+        if not path:
+            return None
+        return cls(path, account, password)
+
+    def _key(self, salt):
+        from Crypto.Hash import SHA256
+        from Crypto.Protocol.KDF import PBKDF2
+
+        return PBKDF2(
+            self.password,
+            salt,
+            32,
+            count=KDF_ITERATIONS,
+            hmac_hash_module=SHA256,
+        )
+
+    def _read_all(self):
+        try:
+            with self.path.open(encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_all(self, entries):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        # 先寫到暫存檔再取代，中途中斷也不會留下壞掉的快取
+        temp = self.path.with_name(self.path.name + ".tmp")
+        fd = os.open(temp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(entries, f)
+        os.replace(temp, self.path)
+
+    def load(self):
+        from Crypto.Cipher import AES
+
+        entry = self._read_all().get(self.entry_id)
+        if not entry:
+            return None
+
+        try:
+            cipher = AES.new(
+                self._key(bytes.fromhex(entry["salt"])),
+                AES.MODE_GCM,
+                nonce=bytes.fromhex(entry["nonce"]),
+            )
+            data = cipher.decrypt_and_verify(
+                bytes.fromhex(entry["data"]), bytes.fromhex(entry["tag"])
+            )
+            return LoginSession(**json.loads(data.decode("utf-8")))
+        except (KeyError, ValueError, TypeError):
+            return None
+
+    def save(self, session):
+        from Crypto.Cipher import AES
+        from Crypto.Random import get_random_bytes
+
+        salt = get_random_bytes(16)
+        cipher = AES.new(self._key(salt), AES.MODE_GCM)
+        data, tag = cipher.encrypt_and_digest(
+            json.dumps(attr.asdict(session)).encode("utf-8")
+        )
+
+        entries = self._read_all()
+        entries[self.entry_id] = {
+            "salt": salt.hex(),
+            "nonce": cipher.nonce.hex(),
+            "tag": tag.hex(),
+            "data": data.hex(),
+        }
+        self._write_all(entries)
+
+    def clear(self):
+        entries = self._read_all()
+        if entries.pop(self.entry_id, None) is not None:
+            self._write_all(entries)
+
+    def restore(self):
+        """
+        用快取的 t 直接開始遊戲，被拒絕時改用 DMM cookie 重新取得遊戲連線，
+        都失敗時回傳 None，交給瀏覽器登入
+        """
+        session = self.load()
+        if session is None:
+            return None
+
+        api = session.make_api()
+        if _validate(api):
+            return api, session.dmm_cookies
+
+        if session.dmm_cookies:
+            from .login import DMMAuthenticator
+
+            authenticator = DMMAuthenticator(self.account, self.password)
+            api = authenticator.login_with_cookies(session.dmm_cookies)
+            if api is not None and _validate(api):
+                return api, authenticator.export_cookies()
+
+        self.clear()
+        return None
+
+
+def _validate(api):
+    """
+    以 login/start 確認 t 還有效，回應留在 api.validated 給 init_first 使用
+    """
+    try:
+        api.validated = api.start()
+    except (APICallFailedException, requests.RequestException, ValueError):
+        return False
+    return True
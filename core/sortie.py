@@ -0,0 +1,202 @@
+import attr
+from colorama import Fore
+from prettytable import PrettyTable
+
+from .clock import time
+from .preferences import preferences_mgr
+
+battle_config = preferences_mgr.get("battle")
+
+# 時間軸的寬度(字元數)
+TIMELINE_WIDTH = 60
+
+# 同一隊連續無法出陣的次數上限
+MAX_FAILURES = 3
+
+
+@attr.s(slots=True)
+class SortieTarget(object):
+    """
+    一個隊伍的出陣目標：地圖、次數與停止條件(battle.conditions.StopConditions)
+    """
+
+    team_id = attr.ib(converter=str)
+    episode = attr.ib(converter=int)
+    field = attr.ib(converter=int)
+    count = attr.ib(converter=int, default=1)
+    until = attr.ib(default=None)
+
+    done = attr.ib(init=False, default=0)
+    failures = attr.ib(init=False, default=0)
+    finished = attr.ib(init=False, default=False)
+    reason = attr.ib(init=False, default="")
+
+    # 這個隊伍下一次最早可以出陣的時間(epoch)
+    next_at = attr.ib(init=False, default=0.0)
+    last_dispatch = attr.ib(init=False, default=0.0)
+
+    def finish(self, reason):
+        self.finished = True
+        self.reason = reason
+
+
+@attr.s(slots=True, frozen=True)
+class TimelineEntry(object):
+    team_id = attr.ib()
+    started = attr.ib()
+    ended = attr.ib()
+    status = attr.ib()
+
+
+class SortieScheduler(object):
+    """
+    多個隊伍交錯出陣
+
+    一個隊伍在等出陣間隔或疲勞恢復時，讓其他已經準備好的隊伍先出陣。
+    所有出陣都透過同一個 client 依序進行，API 的 t 只會有一條鏈
+    """
+
+    def __init__(self, client, targets, interval=None):
+        self.client = client
+        self.targets = list(targets)
+        self.interval = (
+            int(battle_config.get("battle_interval")) if interval is None else interval
+        )
+
+        self.timeline = []
+        self.started_at = None
+        self.ended_at = None
+
+    @property
+    def active(self):
+        return [target for target in self.targets if not target.finished]
+
+    def _ready_at(self, target):
+        """
+        考慮出陣間隔與隊伍狀態後，這個目標最早可以出陣的時間
+        """
+        entry = self.client.readiness.get(target.team_id)
+        if entry.ready_at is None:
+            return None
+        return max(target.next_at, entry.ready_at)
+
+    def _pick(self, now):
+        """
+        回傳現在可以出陣的目標，與沒有時下一次要醒來的時間
+        """
+        candidates = []
+        wake_at = None
+
+        for target in self.active:
+            ready_at = self._ready_at(target)
+            if ready_at is None:
+                entry = self.client.readiness.get(target.team_id)
+                print(Fore.RED + f"第{target.team_id}部隊無法出陣：{entry.reason}")
+                target.finish(entry.reason)
+                continue
+
+            if ready_at <= now:
+                candidates.append(target)
+            elif wake_at is None or ready_at < wake_at:
+                wake_at = ready_at
+
+        if not candidates:
+            return None, wake_at
+
+        # 最久沒有出陣的隊伍優先
+        target = min(candidates, key=lambda t: (t.last_dispatch, int(t.team_id)))
+        return target, None
+
+    def _dispatch(self, target):
+        from battle.base import BattleResult
+
+        started = time()
+        status = self.client.battle(
+            target.team_id, target.episode, target.field, until=target.until
+        )
+        ended = time()
+
+        self.timeline.append(TimelineEntry(target.team_id, started, ended, status))
+        target.last_dispatch = ended
+        target.next_at = ended + self.interval
+
+        if status is None:
+            # 出陣前檢查失敗，重新同步後再試，連續失敗就放棄這個隊伍
+            target.failures += 1
+            if target.failures >= MAX_FAILURES:
+                target.finish("無法出陣")
+            self.client.user_data.mark_dirty()
+            return
+
+        target.failures = 0
+        target.done += 1
+        if status in (BattleResult.BE_DEFEATED, BattleResult.CONDITION_MET):
+            target.finish(status.value)
+        elif target.done >= target.count:
+            target.finish("完成")
+
+    def run(self):
+        self.started_at = time()
+
+        while self.active:
+            self.client.sync_if_needed()
+
+            target, wake_at = self._pick(time())
+            if target is not None:
+                self._dispatch(target)
+                continue
+
+            if wake_at is None:
+                break
+
+            self.client.waiter.wait_until(wake_at)
+
+        self.ended_at = time()
+        return self.timeline
+
+    def report(self):
+        started = self.started_at or time()
+        ended = self.ended_at or time()
+        elapsed = max(ended - started, 1e-6)
+
+        table = PrettyTable()
+        table.field_names = [
+            "隊伍",
+            "地圖",
+            "出陣",
+            "出陣時間(秒)",
+            "使用率",
+            "結束原因",
+        ]
+        for target in self.targets:
+            busy = sum(
+                entry.ended - entry.started
+                for entry in self.timeline
+                if entry.team_id == target.team_id
+            )
+            table.add_row(
+                [
+                    target.team_id,
+                    f"{target.episode}-{target.field}",
+                    f"{target.done}/{target.count}",
+                    f"{busy:.1f}",
+                    f"{busy / elapsed * 100:.1f}%",
+                    target.reason,
+                ]
+            )
+        print(table)
+
+        scale = elapsed / TIMELINE_WIDTH
+        for target in self.targets:
+            row = [" "] * TIMELINE_WIDTH
+            for entry in self.timeline:
+                if entry.team_id != target.team_id:
+                    continue
+                begin = int((entry.started - started) / scale)
+                end = max(begin + 1, int((entry.ended - started) / scale))
+                for i in range(begin, min(end, TIMELINE_WIDTH)):
+                    row[i] = "█"
+            print(f"第{target.team_id}部隊 |{''.join(row)}|")
+
+        total = sum(target.done for target in self.targets)
+        print(f"總共出陣 {total} 次，耗時 {elapsed:.1f} 秒")
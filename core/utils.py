@@ -1,3 +1,6 @@
+from functools import lru_cache
+
+
 def make_datetime(timestr):
     from time import mktime, strptime
     from datetime import datetime
@@ -11,3 +14,19 @@ def get_datime_diff_from_now(timestr):
     target_at = target_at - timedelta(hours=1)  # JP 轉 TW
     now_at = datetime.now()
     return now_at - target_at
+
+
+@lru_cache(maxsize=1024)
+def parse_game_time(timestr):
+    """
+    把遊戲的時間字串(日本時間)轉成本地 epoch 秒數，空值回傳 None
+
+    同一次 party_list 裡很多刀的時間相同，結果會被快取
+    """
+    if not timestr:
+        return None
+
+    from time import mktime, strptime
+
+    # JP 轉 TW
+    return mktime(strptime(timestr, "%Y-%m-%d %H:%M:%S")) - 3600
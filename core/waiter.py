@@ -0,0 +1,87 @@
+from colorama import Fore
+
+from .clock import sleep, time
+from .readiness import TEAM_CONQUEST
+
+# 伺服器與本地時間有些微誤差，醒來時稍微晚一點
+WAKE_MARGIN = 1.0
+
+
+class WaitScheduler(object):
+    """
+    等待隊伍恢復時，精確地睡到可以出陣的時間
+
+    等待期間若有遠征或手入先結束，會在那個時間點醒來處理，
+    領取遠征獎勵或標記刀帳需要重新同步，再繼續睡到原本的時間
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self._handled = set()
+
+    def _tasks(self, deadline):
+        readiness = self.client.readiness
+        teams = self.client.teams
+
+        for team_id, finished in readiness.conquest_finish.items():
+            if finished is None or finished > deadline:
+                continue
+            if teams[team_id].status != TEAM_CONQUEST:
+                continue
+            yield finished, ("conquest", team_id, finished), self._collect_conquest
+
+        for serial, finished in readiness.repair_finish.items():
+            if finished is None or finished > deadline:
+                continue
+            yield finished, ("repair", serial, finished), self._finish_repair
+
+    def _next_task(self, deadline):
+        pending = [
+            task for task in self._tasks(deadline) if task[1] not in self._handled
+        ]
+        return min(pending, key=lambda task: task[0]) if pending else None
+
+    def _collect_conquest(self):
+        # 回本丸時會自動領取已經結束的遠征
+        self.client.home()
+
+    def _finish_repair(self):
+        # 手入結束不會有任何回應，只能重新同步刀帳
+        self.client.user_data.mark_dirty()
+        self.client.readiness.invalidate()
+
+    def wait_until(self, deadline):
+        """
+        睡到 deadline(epoch)，途中處理到期的工作
+        """
+        while True:
+            task = self._next_task(deadline)
+            if task is None:
+                break
+
+            at, key, action = task
+            delay = at + WAKE_MARGIN - time()
+            if delay > 0:
+                sleep(delay)
+
+            self._handled.add(key)
+            action()
+
+        delay = deadline + WAKE_MARGIN - time()
+        if delay > 0:
+            sleep(delay)
+
+    def wait_for_team(self, team_id):
+        """
+        等到指定隊伍可以出陣，無法靠等待恢復時回傳 False
+        """
+        entry = self.client.readiness.get(team_id)
+        if entry.ready_at is None:
+            print(Fore.RED + f"第{team_id}部隊無法出陣：{entry.reason}")
+            return False
+
+        wait = entry.ready_at - time()
+        if wait > 0:
+            print(f"第{team_id}部隊{entry.reason}，等待{int(wait) + 1}秒後出陣...")
+            self.wait_until(entry.ready_at)
+        return True
@@ -0,0 +1,45 @@
+import click
+from colorama import init
+
+from __init__ import __version__
+from orchestrator import Orchestrator, Supervisor, load_accounts
+
+init(autoreset=True)
+
+
+@click.command()
+@click.option("--accounts", default="./configs/accounts.json", show_default=True)
+@click.option("--report-interval", default=600, show_default=True)
+@click.option("--workers", default=1, show_default=True, help="0 表示依 CPU 核心數")
+def cli(accounts, report_interval, workers):
+    print(f"版本：{__version__}")
+
+    if workers != 1:
+        supervisor = Supervisor(
+            load_accounts(accounts),
+            workers=workers or None,
+            report_interval=report_interval,
+        )
+        try:
+            supervisor.run()
+        except KeyboardInterrupt:
+            supervisor.stop()
+            supervisor.report()
+        print("掰掰囉 :D")
+        return
+
+    orchestrator = Orchestrator.from_accounts(load_accounts(accounts))
+    if not orchestrator.sessions:
+        print("沒有可執行的帳號")
+        return
+
+    try:
+        orchestrator.run(report_interval)
+    except KeyboardInterrupt:
+        orchestrator.report()
+
+    print("掰掰囉 :D")
+
+
+if __name__ == "__main__":
+    cli()
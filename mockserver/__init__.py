@@ -0,0 +1 @@
+from .core import MockAccount, MockGameServer, encrypt_battle_msg
@@ -0,0 +1,68 @@
+import click
+from colorama import init
+
+from .core import MockGameServer
+
+init(autoreset=True)
+
+
+def bench(server, sorties, team, episode, field):
+    from time import perf_counter
+
+    from core.client import TkrbClient
+    from core.preferences import preferences_mgr
+
+    # 壓測時只量測客戶端與網路本身，不要等待
+    battle_config = preferences_mgr.get("battle")
+    battle_config.update("battle_interval", 0)
+    battle_config.update("battle_internal_delay", 0)
+    app_config = preferences_mgr.get("system")
+    app_config.update("request_spacing", 0)
+    app_config.update("request_jitter", 0)
+
+    client = TkrbClient.resume(*server.session())
+    if not client:
+        print("無法連線到模擬伺服器")
+        return
+
+    requests_before = server.stats["requests"]
+    started = perf_counter()
+    for _ in range(sorties):
+        client.battle(team, episode, field)
+    elapsed = perf_counter() - started
+    requests = server.stats["requests"] - requests_before
+
+    print(f"出陣 {sorties} 次，耗時 {elapsed:.2f} 秒")
+    print(f"每秒出陣：{sorties / elapsed:.2f}，每秒請求：{requests / elapsed:.2f}")
+    print(f"被拒絕的請求（t 不連續）：{server.stats['rejected']}")
+
+
+@click.command()
+@click.option("--host", default="127.0.0.1", show_default=True)
+@click.option("--port", default=8080, show_default=True)
+@click.option("--latency", default=0.0, show_default=True, help="每個請求的延遲秒數")
+@click.option("--jitter", default=0.0, show_default=True, help="額外隨機延遲上限")
+@click.option("--map-length", default=5, show_default=True)
+@click.option("--bench", "sorties", default=0, help="啟動後直接壓測指定的出陣次數")
+def cli(host, port, latency, jitter, map_length, sorties):
+    server = MockGameServer(
+        host, port, latency=latency, jitter=jitter, map_length=map_length
+    )
+
+    if sorties > 0:
+        server.start()
+        try:
+            bench(server, sorties, 1, 1, 1)
+        finally:
+            server.stop()
+        return
+
+    print(f"模擬伺服器：{server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    cli()
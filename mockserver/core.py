@@ -0,0 +1,497 @@
+import json
+import random
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from time import sleep
+from urllib.parse import parse_qs, urlparse
+
+from Crypto.Cipher import AES
+
+from battle.utils import DECRYPTION_KEY
+
+MOCK_SWORD_IDS = [3, 5, 7, 8, 9, 11, 12, 13, 15, 17, 19, 20, 21, 23, 24, 25]
+MOCK_EQUIP_IDS = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12]
+
+
+def game_time(delta=0):
+    """
+    伺服器回傳日本時間，客戶端會再扣一小時
+    """
+    at = datetime.now() + timedelta(hours=1, seconds=delta)
+    return at.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def encrypt_battle_msg(data):
+    """
+    與 battle.utils.decrypte_battle_msg 相反的動作
+    """
+    raw = json.dumps(data).encode("utf-8")
+    # 客戶端只取到最後一個 '}'，用空白補齊區塊即可
+    raw += b" " * (AES.block_size - len(raw) % AES.block_size)
+
+    iv = bytes(random.getrandbits(8) for _ in range(AES.block_size))
+    cryptor = AES.new(DECRYPTION_KEY, AES.MODE_CBC, iv=iv)
+    return cryptor.encrypt(raw).hex(), iv.hex()
+
+
+class MockAccount(object):
+    """
+    模擬伺服器端單一帳號的本丸狀態
+    """
+
+    def __init__(
+        self, user_id, token, num_swords=24, map_length=5, instant_recovery=True
+    ):
+        self.user_id = user_id
+        self.token = token
+        self.map_length = map_length
+        # 壓測時讓隊伍回本丸就恢復，才能一直出陣
+        self.instant_recovery = instant_recovery
+        self.resource = {
+            "bill": 10,
+            "charcoal": 5000,
+            "steel": 5000,
+            "coolant": 5000,
+            "file": 5000,
+        }
+        self.swords = {}
+        self.equips = {}
+        self.parties = {}
+        self.forge = {}
+        self.repair = {}
+        self.conquest = {}
+        self.sally = None
+
+        equip_serial = 1000
+        for i in range(num_swords):
+            serial = str(100 + i)
+            equips = []
+            for _ in range(3):
+                equip_serial += 1
+                self.equips[str(equip_serial)] = {
+                    "serial_id": str(equip_serial),
+                    "equip_id": random.choice(MOCK_EQUIP_IDS),
+                    "priority": 0,
+                    "soldier": 10,
+                }
+                equips.append(str(equip_serial))
+
+            self.swords[serial] = {
+                "serial_id": serial,
+                "sword_id": MOCK_SWORD_IDS[i % len(MOCK_SWORD_IDS)],
+                "symbol": 0,
+                "level": random.randint(1, 30),
+                "protect": 0,
+                "hp": 40,
+                "hp_max": 40,
+                "exp": 0,
+                "fatigue": 49,
+                "equip_serial_id1": equips[0],
+                "equip_serial_id2": equips[1],
+                "equip_serial_id3": equips[2],
+                "horse_serial_id": None,
+                "recovered_at": game_time(),
+                "status": 0,
+            }
+
+        serials = list(self.swords.keys())
+        for party_no in range(1, 5):
+            members = serials[(party_no - 1) * 6 : party_no * 6]
+            self.parties[str(party_no)] = {
+                "party_no": party_no,
+                "party_name": f"第{party_no}部隊",
+                "status": 1,
+                "finished_at": None,
+                "slot": {
+                    str(idx): {
+                        "serial_id": members[idx - 1] if idx <= len(members) else None
+                    }
+                    for idx in range(1, 7)
+                },
+            }
+
+    def members(self, party_no):
+        slot = self.parties[str(party_no)]["slot"]
+        return [s["serial_id"] for s in slot.values() if s["serial_id"]]
+
+    def party_payload(self):
+        return {k: v for k, v in self.parties.items()}
+
+    def _compact(self, party_no):
+        members = self.members(party_no)
+        slot = self.parties[str(party_no)]["slot"]
+        for idx in range(1, 7):
+            slot[str(idx)] = {
+                "serial_id": members[idx - 1] if idx <= len(members) else None
+            }
+
+    def _find(self, serial):
+        for party_no, party in self.parties.items():
+            for idx, s in party["slot"].items():
+                if s["serial_id"] == serial:
+                    return party_no, idx
+        return None, None
+
+    def set_sword(self, party_no, order, serial):
+        party_no, order = str(party_no), str(order)
+        slot = self.parties[party_no]["slot"]
+        old = slot[order]["serial_id"]
+
+        from_party, from_idx = self._find(serial)
+        if from_party == party_no:
+            # 同隊伍內交換位置
+            slot[from_idx]["serial_id"] = old
+        elif from_party is not None:
+            self.parties[from_party]["slot"][from_idx]["serial_id"] = None
+            self._compact(from_party)
+
+        slot[order]["serial_id"] = serial
+        self._compact(party_no)
+
+    def remove_sword(self, party_no, order):
+        self.parties[str(party_no)]["slot"][str(order)]["serial_id"] = None
+        self._compact(party_no)
+
+    def swap_team(self, before, after):
+        a, b = self.parties[str(before)], self.parties[str(after)]
+        a["slot"], b["slot"] = b["slot"], a["slot"]
+
+    def battle_report(self, rank=2):
+        party_no = self.sally["party_no"]
+        members = self.members(party_no)
+        mvp = random.choice(members) if members else None
+
+        slot = {}
+        for idx, serial in enumerate(members, 1):
+            sword = self.swords[serial]
+            sword["exp"] += 100
+            sword["level"] = min(99, 1 + sword["exp"] // 1000)
+            sword["hp"] = max(1, sword["hp"] - random.randint(0, 2))
+            sword["fatigue"] = max(0, min(100, sword["fatigue"] - 1))
+            sword["recovered_at"] = game_time()
+
+            entry = dict(sword)
+            for i in range(1, 4):
+                entry[f"soldier{i}"] = self.equips[sword[f"equip_serial_id{i}"]][
+                    "soldier"
+                ]
+            slot[str(idx)] = entry
+
+        return {
+            "result": {
+                "rank": rank,
+                "mvp": mvp,
+                "get_sword_id": None,
+                "reward": [],
+                "drop_reward": [],
+                "player": {"party": {"slot": slot}},
+            },
+            "finish": {"is_finish": self.sally["square"] >= self.map_length},
+        }
+
+
+class MockGameServer(object):
+    """
+    離線模擬 TkrbApi 會呼叫到的遊戲 API，用來壓測與量測客戶端的吞吐上限
+
+    latency: 每個請求固定延遲的秒數
+    jitter:  額外隨機延遲的上限秒數
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, jitter=0.0, **options):
+        self.latency = latency
+        self.jitter = jitter
+        self.options = options
+        self.accounts = {}
+        self.stats = {"requests": 0, "rejected": 0}
+        self._lock = threading.Lock()
+        self._thread = None
+
+        self.routes = {
+            "login/start": self.handle_start,
+            "home": self.handle_home,
+            "party/list": self.handle_party_list,
+            "party/setsword": self.handle_set_sword,
+            "party/removesword": self.handle_remove_sword,
+            "party/partyreplacement": self.handle_swap_team,
+            "party/get_sally_party_info": self.handle_empty,
+            "sally": self.handle_sally_info,
+            "sally/sally": self.handle_sally,
+            "sally/forward": self.handle_forward,
+            "sally/homereturn": self.handle_home_return,
+            "sally/eventsally": self.handle_sally,
+            "sally/eventforward": self.handle_forward,
+            "sally/eventreturn": self.handle_home_return,
+            "sally/recovercost": self.handle_empty,
+            "battle/battle": self.handle_battle,
+            "battle/alloutbattle": self.handle_battle,
+            "forge": self.handle_forge,
+            "forge/start": self.handle_forge_start,
+            "forge/complete": self.handle_forge_complete,
+            "repair": self.handle_repair,
+            "repair/repair": self.handle_repair_start,
+            "repair/complete": self.handle_repair_complete,
+            "conquest": self.handle_conquest,
+            "conquest/start": self.handle_conquest_start,
+            "conquest/complete": self.handle_conquest_complete,
+            "duty/complete": self.handle_empty,
+        }
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                form = parse_qs(self.rfile.read(length).decode("utf-8"))
+                form = {k: v[0] for k, v in form.items()}
+                query = parse_qs(urlparse(self.path).query)
+                path = urlparse(self.path).path.strip("/")
+                user_id = query.get("uid", [""])[0]
+
+                body = json.dumps(server.dispatch(path, user_id, form)).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        class Server(ThreadingMixIn, HTTPServer):
+            daemon_threads = True
+
+        self.httpd = Server((host, port), Handler)
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def serve_forever(self):
+        self.httpd.serve_forever()
+
+    def session(self, user_id="1", token="0"):
+        """
+        回傳可以直接給 TkrbApi 的 (url, user_id, cookie, token)
+        """
+        with self._lock:
+            if user_id not in self.accounts:
+                self.accounts[user_id] = MockAccount(user_id, token, **self.options)
+            return self.url, user_id, "mock-cookie", self.accounts[user_id].token
+
+    def dispatch(self, path, user_id, form):
+        delay = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay > 0:
+            sleep(delay)
+
+        with self._lock:
+            self.stats["requests"] += 1
+
+            account = self.accounts.get(user_id)
+            if account is None:
+                # 第一次見到的帳號直接接受對方的 t
+                account = MockAccount(user_id, form.get("t"), **self.options)
+                self.accounts[user_id] = account
+
+            # 維持 t 的鏈結，用舊的 t 就拒絕
+            if form.get("t") != account.token:
+                self.stats["rejected"] += 1
+                return {"status": 1}
+
+            handler = self.routes.get(path)
+            if handler is None:
+                return {"status": 1}
+
+            ret = handler(account, form)
+            account.token = "%032x" % random.getrandbits(128)
+            ret.update({"status": ret.get("status", 0), "t": account.token})
+            return ret
+
+    def handle_empty(self, account, form):
+        return {}
+
+    def handle_start(self, account, form):
+        return {"resource": dict(account.resource)}
+
+    def handle_home(self, account, form):
+        return {
+            "now": game_time(),
+            "party": {
+                k: {"party_no": v["party_no"], "finished_at": v["finished_at"]}
+                for k, v in account.parties.items()
+            },
+            "duty": None,
+        }
+
+    def handle_party_list(self, account, form):
+        return {
+            "party": account.party_payload(),
+            "sword": {k: dict(v) for k, v in account.swords.items()},
+            "equip": {k: dict(v) for k, v in account.equips.items()},
+        }
+
+    def handle_set_sword(self, account, form):
+        account.set_sword(form["party_no"], form["order"], form["serial_id"])
+        return account.party_payload()
+
+    def handle_remove_sword(self, account, form):
+        account.remove_sword(form["party_no"], form["order"])
+        return account.party_payload()
+
+    def handle_swap_team(self, account, form):
+        account.swap_team(form["before_party_no"], form["after_party_no"])
+        return account.party_payload()
+
+    def handle_sally_info(self, account, form):
+        field = {"field_id": 1, "layer_num": 1, "is_finish": False}
+        return {
+            "currency": {"money": 0},
+            "point": {"1": 0},
+            "event": {
+                "event_id": 90,
+                "field": {"1": field},
+                "cost": {"rest": 3, "max": 3},
+                "point": {"1": 0},
+                "collection_item": {},
+            },
+        }
+
+    def handle_sally(self, account, form):
+        party_no = form.get("party_no", "1")
+        account.sally = {"party_no": party_no, "square": 0}
+        for serial in account.members(party_no):
+            account.swords[serial]["fatigue"] = max(
+                0, account.swords[serial]["fatigue"] - 10
+            )
+        return {"freesearch": {"next": []}}
+
+    def handle_forward(self, account, form):
+        if account.sally is None:
+            return {"status": 1}
+
+        account.sally["square"] += 1
+        square = account.sally["square"]
+        ret = {
+            "square_id": square,
+            "is_finish": square >= account.map_length,
+            "freesearch": {"next": [], "movement": 0},
+            "reward": [],
+        }
+        if square % 2 == 1 or square >= account.map_length:
+            ret["scout"] = {"formation_id": random.randint(1, 6)}
+        else:
+            ret["scout"] = {}
+            ret["reward"] = [{"item_id": 2, "item_num": 10, "item_type": 5}]
+        return ret
+
+    def handle_battle(self, account, form):
+        if account.sally is None:
+            return {"status": 1}
+
+        data, iv = encrypt_battle_msg(account.battle_report())
+        return {"data": data, "iv": iv}
+
+    def handle_home_return(self, account, form):
+        if account.sally and account.instant_recovery:
+            for serial in account.members(account.sally["party_no"]):
+                sword = account.swords[serial]
+                sword["hp"] = sword["hp_max"]
+                sword["fatigue"] = max(sword["fatigue"], 49)
+                sword["recovered_at"] = game_time()
+        account.sally = None
+        return {}
+
+    def handle_forge(self, account, form):
+        return {"forge": account.forge, "now": game_time()}
+
+    def handle_forge_start(self, account, form):
+        slot = form["slot_no"]
+        sword_id = random.choice(MOCK_SWORD_IDS)
+        if form.get("use_assist") in ("1", "True"):
+            return {"sword_id": sword_id}
+
+        account.forge[slot] = {
+            "slot_no": slot,
+            "sword_id": sword_id,
+            "finished_at": game_time(1200),
+        }
+        return {"sword_id": sword_id}
+
+    def handle_forge_complete(self, account, form):
+        data = account.forge.pop(form["slot_no"], None)
+        if data is None:
+            return {"status": 1}
+        return {"sword_id": data["sword_id"]}
+
+    def handle_repair(self, account, form):
+        return {"repair": account.repair, "now": game_time()}
+
+    def handle_repair_start(self, account, form):
+        serial, slot = form["serial_id"], form["slot_no"]
+        sword = account.swords.get(serial)
+        if sword is None:
+            return {"status": 1}
+
+        if form.get("use_assist") == "1":
+            sword["hp"] = sword["hp_max"]
+            return {}
+
+        account.repair[slot] = {
+            "slot_no": slot,
+            "sword_serial_id": serial,
+            "finished_at": game_time(600),
+        }
+        return {}
+
+    def handle_repair_complete(self, account, form):
+        data = account.repair.pop(form["slot_no"], None)
+        if data is None:
+            return {"status": 1}
+        sword = account.swords[data["sword_serial_id"]]
+        sword["hp"] = sword["hp_max"]
+        return {"slot_no": form["slot_no"]}
+
+    def handle_conquest(self, account, form):
+        return {
+            "party": {
+                k: {"party_no": v["party_no"], "finished_at": v["finished_at"]}
+                for k, v in account.parties.items()
+            },
+            "summary": account.conquest,
+            "now": game_time(),
+        }
+
+    def handle_conquest_start(self, account, form):
+        party = account.parties.get(form["party_no"])
+        if party is None or party["status"] != 1:
+            return {"status": 1}
+
+        party["status"] = 2
+        party["finished_at"] = game_time(1800)
+        account.conquest[form["party_no"]] = {
+            "party_no": int(form["party_no"]),
+            "field_id": int(form["field_id"]),
+        }
+        return {}
+
+    def handle_conquest_complete(self, account, form):
+        party = account.parties.get(str(form["party_no"]))
+        if party is None or str(form["party_no"]) not in account.conquest:
+            return {"status": 1}
+
+        party["status"] = 1
+        party["finished_at"] = None
+        del account.conquest[str(form["party_no"])]
+        return {}
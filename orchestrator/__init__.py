@@ -0,0 +1,2 @@
+from .core import AccountSession, Orchestrator, load_accounts
+from .supervisor import Supervisor
@@ -0,0 +1,268 @@
+import heapq
+import json
+from time import monotonic, sleep
+
+from colorama import Fore
+from prettytable import PrettyTable
+
+from core.client import TkrbClient, parse
+from core.exceptions import APICallFailedException
+from core.preferences import preferences_mgr
+from core.waiter import WAKE_MARGIN
+
+battle_config = preferences_mgr.get("battle")
+
+
+def load_accounts(filename):
+    """
+    讀取帳號清單，格式為
+    [{"account": "...", "password": "...", "script": "xxx.txt", "repeat": 1}, ...]
+    """
+    with open(filename, "r", encoding="utf-8") as f:
+        accounts = json.load(f)
+
+    for account in accounts:
+        if "account" not in account or "password" not in account:
+            raise ValueError("帳號清單缺少 account 或 password 欄位！")
+    return accounts
+
+
+class AccountSession(object):
+    """
+    單一帳號的執行狀態，每次 step() 只執行一個命令（或一次出陣）
+    """
+
+    def __init__(self, name, client, commands, repeat=1):
+        self.name = name
+        self.client = client
+        self.script = list(commands)
+        self.repeat = repeat
+        self.queue = []
+        self.ready_at = 0.0
+        self.finished = False
+
+        self.sorties = 0
+        self.started_at = monotonic()
+
+        # 目前展開中的出陣命令
+        self._battle = None
+
+    @classmethod
+    def from_script(cls, name, client, filename, repeat=1):
+        with open(filename, "r", encoding="utf-8") as f:
+            commands = [line.strip() for line in f.readlines()]
+        return cls(name, client, [c for c in commands if c], repeat)
+
+    @property
+    def sorties_per_hour(self):
+        hours = (monotonic() - self.started_at) / 3600.0
+        return self.sorties / hours if hours > 0 else 0.0
+
+    def _next_command(self):
+        if not self.queue:
+            if self.repeat == 0:
+                return None
+            if self.repeat > 0:
+                self.repeat -= 1
+            self.queue = self.script[:]
+            if not self.queue:
+                return None
+        return self.queue.pop(0)
+
+    def _step_battle(self):
+        from battle.base import BattleResult
+
+        team_id, episode, field = self._battle["args"]
+        status = self.client.battle(team_id, episode, field)
+
+        if status is None:
+            self._battle = None
+            return 0.0
+
+        if status == BattleResult.TEAM_STATUS_BAD:
+            # 沒有出陣，不計入出陣次數；連續失敗太多次時扣掉一次，隊伍一直無法恢復也會結束
+            print(f"[{self.name}] {status.value}")
+            self._battle["bad"] += 1
+            if self._battle["bad"] >= int(battle_config.get("bad_status_retries")):
+                self._battle["bad"] = 0
+                self._battle["left"] -= 1
+                if self._battle["left"] <= 0:
+                    print(Fore.RED + f"[{self.name}] 隊伍一直無法出陣，放棄剩下的出陣")
+                    self._battle = None
+                    return 0.0
+
+            # 依照隊伍恢復的時間排程，無法推算時才用固定的等待時間
+            ready_in = self.client.time_until_ready(
+                None if team_id == "auto" else team_id
+            )
+            if ready_in is not None:
+                return ready_in + WAKE_MARGIN
+            return int(battle_config.get("bad_status_interval"))
+
+        self.sorties += 1
+        self._battle["bad"] = 0
+        self._battle["left"] -= 1
+
+        if status == BattleResult.BE_DEFEATED:
+            print(f"[{self.name}] {status.value}")
+            self._battle = None
+            return 0.0
+
+        wait = int(battle_config.get("battle_interval"))
+        if self._battle["left"] <= 0:
+            self._battle = None
+        return wait
+
+    def step(self):
+        """
+        執行下一步，回傳距離下一次可以執行的秒數
+        """
+        if self._battle:
+            return self._step_battle()
+
+        command = self._next_command()
+        if command is None:
+            self.finished = True
+            return 0.0
+
+        print(Fore.CYAN + f"[{self.name}] {command}")
+        method, options = parse(command)
+        if not method:
+            return 0.0
+
+        if method == "exit":
+            self.finished = True
+            return 0.0
+
+        # sleep 不阻塞整個 loop，只延後這個帳號
+        if method == "sleep":
+            return int(options.get("sleeptime", 0))
+
+        if method == "play":
+            with open(options.get("filename"), "r", encoding="utf-8") as f:
+                lines = [line.strip() for line in f.readlines()]
+            self.queue = [line for line in lines if line] + self.queue
+            return 0.0
+
+        # 多次出陣拆成單次，讓其他帳號可以插隊
+        if method == "battle":
+            team_id = options["-p"]
+            self._battle = {
+                "args": (
+                    team_id if team_id == "auto" else int(team_id),
+                    int(options["episode"]),
+                    int(options["field"]),
+                ),
+                "left": int(options.get("-t", 1)),
+                "bad": 0,
+            }
+            return self._step_battle()
+
+        self.client.execute(method, options)
+        return 0.0
+
+
+class Orchestrator(object):
+    """
+    在同一個行程內公平地輪流執行多個帳號的命令腳本
+
+    刀劍與刀裝的主資料（core.database.sword_data / equipment_data）與已編譯的
+    命令文法都是模組層級的物件，同一個行程內的所有帳號自然共用
+    """
+
+    def __init__(self):
+        self.sessions = []
+        self._heap = []
+        self._order = 0
+
+    def add(self, session):
+        self.sessions.append(session)
+        self._push(session)
+
+    def _push(self, session):
+        # 同時可執行時，依照加入（或上次執行）的順序輪流
+        self._order += 1
+        heapq.heappush(self._heap, (session.ready_at, self._order, session))
+
+    @classmethod
+    def from_accounts(cls, accounts, resume=None):
+        """
+        resume: 帳號對應到 (server_url, user_id, cookie, token)，有的話優先沿用
+        """
+        resume = resume or {}
+
+        obj = cls()
+        for info in accounts:
+            name = info["account"]
+            print(f"[{name}] ", end="")
+
+            client = None
+            if name in resume:
+                client = TkrbClient.resume(*resume[name])
+            if not client:
+                client = TkrbClient.create(name, info["password"])
+            if not client:
+                print(Fore.RED + f"[{name}] 登入失敗，略過")
+                continue
+
+            script = info.get("script")
+            repeat = int(info.get("repeat", 1))
+            if script:
+                session = AccountSession.from_script(name, client, script, repeat)
+            else:
+                session = AccountSession(name, client, [], 0)
+            obj.add(session)
+        return obj
+
+    def run(self, report_interval=600, on_step=None):
+        next_report = monotonic() + report_interval
+
+        while self._heap:
+            ready_at, _, session = heapq.heappop(self._heap)
+
+            wait = ready_at - monotonic()
+            if wait > 0:
+                sleep(wait)
+
+            try:
+                delay = session.step()
+            except APICallFailedException as e:
+                print(Fore.RED + f"[{session.name}] API 呼叫失敗：{e}")
+                delay = int(battle_config.get("bad_status_interval"))
+
+            if not session.finished:
+                session.ready_at = monotonic() + delay
+                self._push(session)
+
+            if on_step:
+                on_step(session)
+
+            if report_interval > 0 and monotonic() >= next_report:
+                self.report()
+                next_report = monotonic() + report_interval
+
+        self.report()
+
+    def report(self):
+        table = PrettyTable()
+        table.field_names = ["帳號", "出陣次數", "每小時出陣", "狀態"]
+        for session in self.sessions:
+            table.add_row(
+                [
+                    session.name,
+                    session.sorties,
+                    f"{session.sorties_per_hour:.1f}",
+                    "完成" if session.finished else "執行中",
+                ]
+            )
+        print(table)
+
+    def summary(self):
+        return {
+            session.name: {
+                "sorties": session.sorties,
+                "sorties_per_hour": session.sorties_per_hour,
+                "finished": session.finished,
+            }
+            for session in self.sessions
+        }
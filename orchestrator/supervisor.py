@@ -0,0 +1,207 @@
+import multiprocessing
+import os
+import queue
+from time import monotonic
+
+from colorama import Fore
+from prettytable import PrettyTable
+
+# 訊息一律用 tuple 傳遞，第一欄為種類
+#   ("c", account, server_url, user_id, cookie)  登入完成
+#   ("s", account, sorties, token)               每一步之後的進度
+MSG_CREDENTIAL = "c"
+MSG_STEP = "s"
+
+
+def _worker_main(shard_id, accounts, resume, channel, report_interval):
+    from .core import Orchestrator
+
+    orchestrator = Orchestrator.from_accounts(accounts, resume)
+
+    for session in orchestrator.sessions:
+        api = session.client.api
+        channel.put(
+            (
+                MSG_CREDENTIAL,
+                session.name,
+                api.server_url,
+                api.user_id,
+                api.payload["sword"],
+            )
+        )
+
+    def on_step(session):
+        channel.put(
+            (MSG_STEP, session.name, session.sorties, session.client.api.payload["t"])
+        )
+
+    orchestrator.run(report_interval, on_step=on_step)
+
+
+class WorkerState(object):
+    def __init__(self, shard_id, accounts):
+        self.shard_id = shard_id
+        self.accounts = accounts
+        self.process = None
+        self.started_at = 0.0
+        self.restarts = 0
+        self.done = False
+
+        # 重啟之後的出陣數要接續累計
+        self.sorties = {}
+        self._base_sorties = {}
+
+    @property
+    def total_sorties(self):
+        return sum(self._base_sorties.values()) + sum(self.sorties.values())
+
+    def rebase(self):
+        for name, count in self.sorties.items():
+            self._base_sorties[name] = self._base_sorties.get(name, 0) + count
+        self.sorties.clear()
+
+
+class Supervisor(object):
+    """
+    把帳號分散到多個行程，每個行程各自跑一個 Orchestrator
+
+    行程意外結束時，會用最後回報的 token 重新啟動，不需要重新登入
+    """
+
+    def __init__(self, accounts, workers=None, max_restarts=3, report_interval=600):
+        workers = workers or os.cpu_count() or 1
+        workers = max(1, min(workers, len(accounts)))
+
+        self.max_restarts = max_restarts
+        self.report_interval = report_interval
+        self.channel = multiprocessing.Queue()
+        self.workers = [WorkerState(i, accounts[i::workers]) for i in range(workers)]
+
+        # 帳號 -> [server_url, user_id, cookie, token]
+        self.credentials = {}
+        self.started_at = monotonic()
+
+    def _spawn(self, worker):
+        resume = {
+            info["account"]: tuple(self.credentials[info["account"]])
+            for info in worker.accounts
+            if info["account"] in self.credentials
+            and self.credentials[info["account"]][3]
+        }
+
+        worker.process = multiprocessing.Process(
+            target=_worker_main,
+            args=(
+                worker.shard_id,
+                worker.accounts,
+                resume,
+                self.channel,
+                self.report_interval,
+            ),
+            daemon=True,
+        )
+        worker.started_at = monotonic()
+        worker.process.start()
+
+    def _find_worker(self, account):
+        for worker in self.workers:
+            if any(info["account"] == account for info in worker.accounts):
+                return worker
+        return None
+
+    def _handle_message(self, msg):
+        kind, account = msg[0], msg[1]
+
+        if kind == MSG_CREDENTIAL:
+            _, _, url, user_id, cookie = msg
+            token = self.credentials.get(account, [None] * 4)[3]
+            self.credentials[account] = [url, user_id, cookie, token]
+            return
+
+        if kind == MSG_STEP:
+            _, _, sorties, token = msg
+            if account in self.credentials:
+                self.credentials[account][3] = token
+
+            worker = self._find_worker(account)
+            if worker:
+                worker.sorties[account] = sorties
+
+    def _drain(self, timeout):
+        # 檢查行程狀態前先把訊息讀完，重啟時才會拿到最後的 token
+        try:
+            self._handle_message(self.channel.get(timeout=timeout))
+            while True:
+                self._handle_message(self.channel.get_nowait())
+        except queue.Empty:
+            pass
+
+    def _check_workers(self):
+        for worker in self.workers:
+            if worker.done or worker.process.is_alive():
+                continue
+
+            exitcode = worker.process.exitcode
+            if exitcode == 0:
+                worker.done = True
+                continue
+
+            if worker.restarts >= self.max_restarts:
+                print(Fore.RED + f"工作行程 {worker.shard_id} 重啟次數過多，放棄")
+                worker.done = True
+                continue
+
+            worker.restarts += 1
+            worker.rebase()
+            print(
+                Fore.YELLOW
+                + f"工作行程 {worker.shard_id} 異常結束({exitcode})，重新啟動"
+            )
+            self._spawn(worker)
+
+    def run(self):
+        for worker in self.workers:
+            self._spawn(worker)
+
+        next_report = monotonic() + self.report_interval
+
+        while not all(worker.done for worker in self.workers):
+            self._drain(timeout=1.0)
+            self._check_workers()
+
+            if self.report_interval > 0 and monotonic() >= next_report:
+                self.report()
+                next_report = monotonic() + self.report_interval
+
+        self.report()
+
+    def stop(self):
+        for worker in self.workers:
+            if worker.process and worker.process.is_alive():
+                worker.process.terminate()
+
+    def report(self):
+        hours = (monotonic() - self.started_at) / 3600.0
+
+        table = PrettyTable()
+        table.field_names = [
+            "行程",
+            "PID",
+            "帳號數",
+            "出陣次數",
+            "每小時出陣",
+            "重啟次數",
+        ]
+        for worker in self.workers:
+            sorties = worker.total_sorties
+            table.add_row(
+                [
+                    worker.shard_id,
+                    worker.process.pid if worker.process else "-",
+                    len(worker.accounts),
+                    sorties,
+                    f"{sorties / hours:.1f}" if hours > 0 else "0.0",
+                    worker.restarts,
+                ]
+            )
+        print(table)
@@ -0,0 +1,70 @@
+import click
+from colorama import init
+
+from core.api import TkrbApi
+from core.cassette import Cassette
+from core.clock import use_clock
+from core.client import TkrbClient, execute
+from core.exceptions import CassetteException
+from core.preferences import preferences_mgr
+
+init(autoreset=True)
+
+
+def run(cassette_file, commands):
+    from time import perf_counter
+
+    # 回放時不需要等待伺服器
+    battle_config = preferences_mgr.get("battle")
+    for name in ("battle_interval", "battle_internal_delay", "bad_status_interval"):
+        battle_config.update(name, 0)
+    app_config = preferences_mgr.get("system")
+    for name in ("request_spacing", "request_jitter"):
+        app_config.update(name, 0)
+
+    cassette = Cassette.replay(cassette_file)
+    print(f"載入 {len(cassette)} 筆記錄")
+
+    api = TkrbApi(url="", user_id="", cookie="", token="")
+    api.attach_cassette(cassette)
+
+    # 疲勞、隊伍恢復與等待都改用記錄當時的時間，回放結果才會每次相同
+    use_clock(cassette.clock)
+
+    started = perf_counter()
+    try:
+        client = TkrbClient(api)
+        for command in commands:
+            print(command)
+            execute(client, command)
+    except CassetteException as e:
+        print(f"記錄已用完：{e}")
+    finally:
+        use_clock(None)
+
+    print(f"回放耗時 {perf_counter() - started:.2f} 秒")
+
+
+@click.command()
+@click.argument("cassette_file")
+@click.option("--script", default=None, help="要執行的命令腳本")
+@click.option("--command", "-c", multiple=True, help="要執行的命令，可以重複")
+@click.option("--profile", default=None, help="輸出 cProfile 結果到指定檔案")
+def cli(cassette_file, script, command, profile):
+    commands = list(command)
+    if script:
+        with open(script, "r", encoding="utf-8") as f:
+            commands += [line.strip() for line in f.readlines() if line.strip()]
+
+    if profile:
+        import cProfile
+
+        cProfile.runctx(
+            "run(cassette_file, commands)", globals(), locals(), filename=profile
+        )
+    else:
+        run(cassette_file, commands)
+
+
+if __name__ == "__main__":
+    cli()
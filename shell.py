@@ -4,6 +4,7 @@ from prompt_toolkit import PromptSession
 from prompt_toolkit.history import InMemoryHistory
 
 from __init__ import __version__
+from core.cassette import Cassette
 from core.client import TkrbClient, execute
 
 init(autoreset=True)
@@ -32,14 +33,22 @@ class TkrbCLI(object):
 @click.command()
 @click.option("--account", prompt="帳號", required=True)
 @click.option("--password", prompt="密碼", hide_input=True, required=True)
-def cli(account, password):
-    client = TkrbClient.create(account, password)
-
-    if not client:
-        return
-
-    cli = TkrbCLI(client)
-    cli.run_cli()
+@click.option("--record", default=None, help="將所有 API 請求記錄到指定檔案")
+def cli(account, password, record):
+    cassette = Cassette.record(record) if record else None
+    try:
+        client = TkrbClient.create(account, password, cassette=cassette)
+        if not client:
+            return
+
+        cli = TkrbCLI(client)
+        try:
+            cli.run_cli()
+        finally:
+            client.save_session()
+    finally:
+        if cassette:
+            cassette.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,44 @@
+from core import clock
+from core.cassette import Cassette
+from core.clock import VirtualClock
+
+
+class FakeResponse(object):
+    status_code = 200
+    text = '{"status": 0}'
+
+
+def test_replay_follows_recorded_time(tmp_path, monkeypatch):
+    filename = str(tmp_path / "session.gz")
+
+    recorded = iter([1000.0, 1005.0, 1300.0])
+    monkeypatch.setattr("core.cassette.time", lambda: next(recorded))
+
+    cassette = Cassette.record(filename)
+    cassette.play("home", None, FakeResponse)
+    cassette.play("home", None, FakeResponse)
+    cassette.close()
+
+    cassette = Cassette.replay(filename)
+    assert cassette.clock.time() == 1000.0
+
+    cassette.play("home", None, None)
+    assert cassette.clock.time() == 1005.0
+
+    # 回放時的等待只推進時間，比記錄快的部分由下一筆補上
+    cassette.clock.sleep(100)
+    assert cassette.clock.time() == 1105.0
+    cassette.play("home", None, None)
+    assert cassette.clock.time() == 1300.0
+
+
+def test_use_clock_switches_module_time():
+    virtual = VirtualClock(50.0)
+    clock.use_clock(virtual)
+    try:
+        clock.sleep(10)
+        assert clock.time() == 60.0
+    finally:
+        clock.use_clock(None)
+
+    assert clock.time() > 60.0
@@ -0,0 +1,132 @@
+import random
+
+import pytest
+
+from core.lineup import (
+    OP_REMOVE,
+    OP_SET,
+    OP_SWAP,
+    TEAM_SIZE,
+    _plan_members,
+    plan_lineups,
+    simulate,
+)
+
+TEAMS = ("1", "2", "3", "4")
+
+
+def apply_checked(current, ops):
+    """
+    逐步套用，每一步都檢查伺服器會拒絕的狀態
+    """
+    state = current
+    for op in ops:
+        if op.kind == OP_REMOVE:
+            assert not (op.team == "1" and len(state["1"]) == 1)
+            assert state[op.team][op.index - 1] == op.serial
+        elif op.kind == OP_SET:
+            assert op.index <= len(state[op.team]) + 1
+
+        state = simulate(state, [op])
+        assert state["1"], f"{op} 讓第1部隊沒有刀"
+        assert all(len(members) <= TEAM_SIZE for members in state.values())
+    return state
+
+
+def random_case(rng):
+    serials = [str(100 + idx) for idx in range(30)]
+    rng.shuffle(serials)
+
+    current = {}
+    for team_id in TEAMS:
+        size = rng.randint(1 if team_id == "1" else 0, TEAM_SIZE)
+        current[team_id] = [serials.pop() for _ in range(size)]
+
+    pool = [serial for members in current.values() for serial in members]
+    pool += serials[:6]
+    rng.shuffle(pool)
+
+    desired = {}
+    for team_id in rng.sample(TEAMS, rng.randint(1, 2)):
+        size = rng.randint(1 if team_id == "1" else 0, TEAM_SIZE)
+        desired[team_id] = [pool.pop() for _ in range(min(size, len(pool)))]
+    return current, desired
+
+
+def test_keeps_captain_when_pulling_from_team_1():
+    current = {
+        "1": ["104", "100"],
+        "2": [],
+        "3": ["101"],
+        "4": ["108", "103", "115", "114"],
+    }
+    desired = {"4": ["108", "110", "113", "104", "105"]}
+
+    ops = plan_lineups(current, desired)
+    final = apply_checked(simulate(current, []), ops)
+
+    assert final["4"] == tuple(desired["4"])
+    assert final["1"] == ("100",)
+
+
+def test_rejects_emptying_team_1():
+    current = {
+        "1": ["104"],
+        "2": [],
+        "3": ["100", "101"],
+        "4": ["108", "103", "115", "114"],
+    }
+    with pytest.raises(ValueError):
+        plan_lineups(current, {"4": ["108", "110", "113", "104", "105"]})
+
+    with pytest.raises(ValueError):
+        plan_lineups(current, {"1": []})
+
+
+def test_rejects_duplicates_and_oversize():
+    current = {"1": ["100"], "2": ["101"]}
+    with pytest.raises(ValueError):
+        plan_lineups(current, {"2": ["102", "102"]})
+    with pytest.raises(ValueError):
+        plan_lineups(current, {"2": [str(200 + idx) for idx in range(7)]})
+    with pytest.raises(ValueError):
+        plan_lineups(current, {"5": ["100"]})
+
+
+def test_swap_team_is_used_for_whole_lineups():
+    current = {"1": ["100", "101"], "2": ["102", "103"]}
+    ops = plan_lineups(current, {"1": ["102", "103"], "2": ["100", "101"]})
+    assert [op.kind for op in ops] == [OP_SWAP]
+
+
+def test_greedy_never_pulls_last_captain():
+    state = {"1": ["100"], "2": []}
+    assert _plan_members(state, {"2": ["100"]}) is None
+
+
+@pytest.mark.parametrize("seed", range(300))
+def test_random_plans_are_legal(seed):
+    rng = random.Random(seed)
+    current, desired = random_case(rng)
+
+    team_1_taken = "1" not in desired and set(current["1"]).issubset(
+        serial for members in desired.values() for serial in members
+    )
+    if team_1_taken:
+        with pytest.raises(ValueError):
+            plan_lineups(current, desired)
+        return
+
+    ops = plan_lineups(current, desired, budget=2000)
+    final = apply_checked(simulate(current, []), ops)
+
+    for team_id, members in desired.items():
+        assert final[team_id] == tuple(members)
+
+    # 沒有指定的隊伍只會少掉被拉走的刀，不會多出別的刀
+    wanted = {serial for members in desired.values() for serial in members}
+    for team_id in TEAMS:
+        if team_id in desired:
+            continue
+        kept = tuple(serial for serial in current[team_id] if serial not in wanted)
+        assert final[team_id] == kept
@@ -0,0 +1,82 @@
+import pytest
+
+from core.datatype import Sword, sortie_fatigue
+from core.sakura import SAKURA_RANK, SakuraPlanner, solo_sorties, sortie_fatigues
+
+
+def make_sword(serial, fatigue):
+    return Sword(
+        serial,
+        "3",
+        serial,
+        0,
+        10,
+        0,
+        30,
+        30,
+        0,
+        fatigue,
+        None,
+        None,
+        None,
+        None,
+        None,
+        0,
+    )
+
+
+def play_sortie(sword, rank, leader=False, mvp=False):
+    sword.battle_init()
+    sword.calculate_battle_fatigue(rank, leader=leader, mvp=mvp)
+    sword.battle_end()
+    return sword.fatigue
+
+
+@pytest.mark.parametrize("fatigue", [0, 5, 10, 49, 79, 95, 100])
+@pytest.mark.parametrize("leader,mvp", [(False, False), (True, False), (True, True)])
+def test_sortie_fatigue_matches_sword(fatigue, leader, mvp):
+    sword = make_sword("1", fatigue)
+    assert sortie_fatigue(fatigue, SAKURA_RANK, leader, mvp) == play_sortie(
+        sword, SAKURA_RANK, leader, mvp
+    )
+
+
+def test_solo_sortie_matches_sword():
+    sword = make_sword("1", 49)
+    expected = sortie_fatigues(("1",), {"1": 49})["1"]
+    assert expected == play_sortie(sword, SAKURA_RANK, leader=True, mvp=True)
+
+
+def test_team_sortie_is_expected_value_of_mvp():
+    lineup = tuple(str(idx) for idx in range(6))
+    fatigues = {serial: 49 for serial in lineup}
+    expected = sortie_fatigues(lineup, fatigues)
+
+    for idx, serial in enumerate(lineup):
+        leader = idx == 0
+        without = play_sortie(make_sword(serial, 49), SAKURA_RANK, leader)
+        with_mvp = play_sortie(make_sword(serial, 49), SAKURA_RANK, leader, True)
+        assert expected[serial] == pytest.approx(without + (with_mvp - without) / 6)
+
+
+def test_plan_reaches_target_with_real_model():
+    lineup = tuple(str(idx) for idx in range(6))
+    fatigues = {serial: 49 for serial in lineup}
+    plan = SakuraPlanner().plan("1", lineup, fatigues)
+
+    assert not plan.unfinished
+    assert plan.sorties == sum(solo_sorties(49) for _ in lineup)
+
+    # 依照計畫逐場用 Sword 的模型重播，結果要與預期一致
+    swords = {serial: make_sword(serial, 49) for serial in lineup}
+    for step in plan.steps:
+        assert len(step.lineup) == 1
+        play_sortie(swords[step.captain], SAKURA_RANK, leader=True, mvp=True)
+        assert swords[step.captain].fatigue == step.expected[step.captain]
+    assert all(sword.fatigue >= 80 for sword in swords.values())
+
+
+def test_unreachable_rank_is_reported():
+    plan = SakuraPlanner(rank=6).plan("1", ("1",), {"1": 49})
+    assert plan.unfinished == ("1",)
+    assert solo_sorties(49, rank=6) is None